@@ -0,0 +1,76 @@
+"""
+Compare clean_text with the BeautifulSoup get_text + normalize_text path it
+replaced, on synthetic Brave-like snippets and FMP-like HTML bodies.
+
+    uv run python -m benchmarks.clean_text [articles]
+"""
+
+import random
+import re
+import sys
+import time
+import unicodedata
+
+from bs4 import BeautifulSoup
+
+from optifeed.bi.news import clean_text
+
+WORDS = (
+    "fed ecb rates inflation oil crude opec earnings quarter merger takeover "
+    "Nvidia Apple Tesla S&amp;P Nasdaq café Zürich ＥＣＢ ﬁnance “guidance” ½"
+).split()
+
+
+def reference_clean(text: str) -> str:
+    """BeautifulSoup get_text followed by the former normalize_text."""
+    text = BeautifulSoup(text or "", "html.parser").get_text()
+    text = unicodedata.normalize("NFKC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def snippet(rng: random.Random) -> str:
+    """Brave-like description: mostly plain, some highlights."""
+    text = sentence(rng, 30)
+    if rng.random() < 0.3:
+        text = text.replace("oil", "<strong>oil</strong>")
+    return text
+
+
+def html_body(rng: random.Random) -> str:
+    """FMP-like article: paragraphs, links, lists and an image."""
+    paragraphs = "".join(f"<p>{sentence(rng, 40)}</p>\n" for _ in range(5))
+    return (
+        f'<div>{paragraphs}<a href="https://example.com/?a=1&amp;b=2">More</a>'
+        f"<ul><li>{sentence(rng, 5)}</li><li>EPS&nbsp;$1.20</li></ul>"
+        '<img src="chart.png" alt="chart"></div>'
+    )
+
+
+def bench(name: str, texts: list[str]):
+    started = time.perf_counter()
+    expected = [reference_clean(text) for text in texts]
+    before = time.perf_counter() - started
+
+    started = time.perf_counter()
+    actual = [clean_text(text) for text in texts]
+    after = time.perf_counter() - started
+
+    mismatches = sum(a != e for a, e in zip(actual, expected))
+    print(
+        f"{name:>8}: {before / len(texts) * 1e6:6.1f} -> "
+        f"{after / len(texts) * 1e6:6.1f} us/article, {mismatches} mismatches"
+    )
+
+
+def main(articles: int = 20_000):
+    rng = random.Random(0)
+    bench("plain", [snippet(rng) for _ in range(articles)])
+    bench("html", [html_body(rng) for _ in range(articles)])
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
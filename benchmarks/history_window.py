@@ -0,0 +1,92 @@
+"""
+Per-ask cost of keeping a user's history in budget: ConversationWindow
+against the trimming it replaced, which rescanned the whole history on
+every ask. Each ask appends a question and an answer, as the worker does.
+
+    uv run python -m benchmarks.history_window [asks]
+"""
+
+import sys
+import time
+
+from pydantic_ai.messages import ModelRequest, ModelResponse, TextPart, UserPromptPart
+
+from optifeed.utils.logger import logger
+from optifeed.worker.history import MIN_MESSAGES_TO_KEEP, ConversationWindow
+
+MESSAGE_CHARS = 100
+# Window sizes to compare, in messages; the char budget holds them all
+WINDOW_SIZES = (50, 250, 400)
+
+
+def estimate_context_length(messages: list) -> int:
+    return sum(len(message.parts[0].content) for message in messages)
+
+
+def reference_trim(messages: list, max_chars: int, max_messages: int) -> list:
+    """
+    The former trim_history_by_context and message cap, run on the whole
+    history at every ask (with message.content read from the first part).
+    """
+    if len(messages) <= MIN_MESSAGES_TO_KEEP:
+        return messages
+    if estimate_context_length(messages) > max_chars:
+        trimmed, length = [], 0
+        for message in reversed(messages):
+            message_length = len(message.parts[0].content)
+            if length + message_length <= max_chars:
+                trimmed.insert(0, message)
+                length += message_length
+            elif len(trimmed) >= MIN_MESSAGES_TO_KEEP:
+                break
+        if len(trimmed) < MIN_MESSAGES_TO_KEEP:
+            trimmed = messages[-MIN_MESSAGES_TO_KEEP:]
+        logger.debug(
+            f"🧹 Trimmed history: {len(messages)} -> {len(trimmed)} messages, "
+            f"{estimate_context_length(messages)} -> {estimate_context_length(trimmed)} chars"
+        )
+        messages = trimmed
+    return messages[-max_messages:]
+
+
+def new_turn(n: int) -> list:
+    return [
+        ModelRequest(
+            parts=[UserPromptPart(f"Question {n} ".ljust(MESSAGE_CHARS, "?"))]
+        ),
+        ModelResponse(parts=[TextPart(f"Answer {n} ".ljust(MESSAGE_CHARS, "."))]),
+    ]
+
+
+def run_reference(asks: int, max_chars: int, max_messages: int) -> float:
+    history = []
+    started = time.perf_counter()
+    for n in range(asks):
+        history = reference_trim(history + new_turn(n), max_chars, max_messages)
+    return (time.perf_counter() - started) / asks
+
+
+def run_window(asks: int, max_chars: int, max_messages: int) -> float:
+    window = ConversationWindow(max_chars=max_chars, max_messages=max_messages)
+    started = time.perf_counter()
+    for n in range(asks):
+        window.extend(new_turn(n))
+        window.pending.clear()  # Folded into the summary by the worker
+    return (time.perf_counter() - started) / asks
+
+
+def main(asks: int = 2000):
+    logger.remove()  # Both trim paths log at debug level
+    for size in WINDOW_SIZES:
+        # The char budget binds just before the message cap, as in production
+        max_chars, max_messages = (size - 1) * MESSAGE_CHARS, size
+        before = min(run_reference(asks, max_chars, max_messages) for _ in range(3))
+        after = min(run_window(asks, max_chars, max_messages) for _ in range(3))
+        print(
+            f"~{size}-message window: old {before * 1e6:.1f} us, "
+            f"new {after * 1e6:.1f} us per ask"
+        )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,73 @@
+"""
+Compare ThemeMatcher with the per-keyword substring scan it replaced, on
+synthetic 8-14 word headlines mixing theme keywords, their inflections and
+demonyms, and words that only contain a keyword ("award", "federal").
+
+    uv run python -m benchmarks.theme_matcher [headlines]
+"""
+
+import random
+import sys
+import time
+
+from optifeed.bi.news import THEMES, theme_matcher
+
+WORDS = (
+    "markets stocks shares investors traders futures bonds yields dollar euro "
+    "company chief executive says report week quarter growth outlook guidance "
+    "war wars warfare attack attacked Russian Ukraine Israeli Chinese Iran "
+    "hackers hacked cybersecurity flooding floods hurricane wildfire voters "
+    "election ballots strike striking protesters union oil crude barrels "
+    "inflation CPI Fed ECB rate hike merger takeover downgraded rating earnings"
+).split()
+# Words containing a keyword that the substring scan wrongly matched
+DECOYS = "award software federal recipient warn stewardship".split()
+
+
+def reference_match(text: str) -> list[str]:
+    """The former filter: a substring scan for every keyword of every theme."""
+    text = text.lower()
+    return [
+        theme
+        for theme, keywords in THEMES.items()
+        if any(word in text for word in keywords)
+    ]
+
+
+def headline(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 14))]
+    if rng.random() < 0.2:
+        words[rng.randrange(len(words))] = rng.choice(DECOYS)
+    return " ".join(words)
+
+
+def best_of(runs: int, fn, texts: list[str]) -> tuple[float, list]:
+    timings, results = [], None
+    for _ in range(runs):
+        started = time.perf_counter()
+        results = [fn(text) for text in texts]
+        timings.append(time.perf_counter() - started)
+    return min(timings), results
+
+
+def main(headlines: int = 100_000):
+    rng = random.Random(0)
+    texts = [headline(rng) for _ in range(headlines)]
+
+    before, expected = best_of(3, reference_match, texts)
+    after, actual = best_of(3, theme_matcher.match, texts)
+
+    print(f"substring scan: {before:.2f}s, {sum(map(bool, expected))} kept")
+    print(f"  ThemeMatcher: {after:.2f}s, {sum(map(bool, actual))} kept")
+    lost = [
+        text for text, old, new in zip(texts, expected, actual) if set(old) - set(new)
+    ]
+    with_decoy = sum(any(decoy in text.split() for decoy in DECOYS) for text in lost)
+    print(
+        f"{len(lost)} headlines lose a theme the substring scan found, "
+        f"{len(lost) - with_decoy} without an in-word decoy"
+    )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
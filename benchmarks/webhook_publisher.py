@@ -0,0 +1,94 @@
+"""
+Webhook requests per second through AsyncRabbitPublisher, against a real
+RabbitMQ broker such as the compose service:
+
+    docker compose up -d rabbitmq
+    RABBIT_HOST=localhost RABBIT_USER=guest RABBIT_PASS=guest \
+        uv run python -m benchmarks.webhook_publisher [requests] [clients]
+
+The FastAPI app runs in-process (no HTTP server), once with a connection
+per request as before the publisher pool, then with pools of 1, 2 and 4
+channels. Tasks go to a temporary queue, so a running worker never sees them.
+"""
+
+import asyncio
+import sys
+import time
+
+import httpx
+import pika
+
+from optifeed.api import app as api
+from optifeed.utils import rabbitmq
+from optifeed.utils.logger import logger
+from optifeed.utils.rabbitmq import AsyncRabbitPublisher, RabbitPublisher
+
+BENCHMARK_QUEUE = "webhook_benchmark"
+
+UPDATE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 1,
+        "from": {"id": 42, "first_name": "Bench"},
+        "chat": {"id": 42, "type": "private"},
+        "text": "Quel est l'impact de la Fed sur les banques ?",
+    },
+}
+
+
+class ConnectionPerRequest(AsyncRabbitPublisher):
+    """The webhook's former publishing: one blocking connection per task."""
+
+    async def start(self):
+        pass
+
+    async def publish(self, task: dict):
+        with RabbitPublisher() as publisher:
+            publisher.publish(task)
+
+    async def close(self):
+        pass
+
+
+async def run(publisher: AsyncRabbitPublisher, requests: int, clients: int) -> float:
+    """Post `requests` updates from `clients` concurrent clients, return req/s."""
+    api.publisher = publisher
+    transport = httpx.ASGITransport(app=api.app)
+    async with api.lifespan(api.app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            remaining = iter(range(requests))
+
+            async def post_all():
+                for _ in remaining:
+                    response = await client.post("/webhook", json=UPDATE)
+                    response.raise_for_status()
+
+            started = time.perf_counter()
+            await asyncio.gather(*(post_all() for _ in range(clients)))
+            return requests / (time.perf_counter() - started)
+
+
+def main(requests: int = 2000, clients: int = 32):
+    logger.remove()  # The webhook logs every update at debug level
+    connection = pika.BlockingConnection(rabbitmq.connection_parameters())
+    channel = connection.channel()
+    channel.queue_declare(queue=BENCHMARK_QUEUE)
+    rabbitmq.TASK_ROUTES["ask"] = BENCHMARK_QUEUE
+    try:
+        candidates = [("connection per request", ConnectionPerRequest())] + [
+            (f"pool of {size}", AsyncRabbitPublisher(pool_size=size))
+            for size in (1, 2, 4)
+        ]
+        for name, publisher in candidates:
+            rate = asyncio.run(run(publisher, requests, clients))
+            published = channel.queue_purge(BENCHMARK_QUEUE).method.message_count
+            print(f"{name:>24}: {rate:7.0f} req/s ({published} tasks published)")
+    finally:
+        channel.queue_delete(BENCHMARK_QUEUE)
+        connection.close()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -1,10 +1,23 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
 from optifeed.utils.logger import logger
-from optifeed.utils.rabbitmq import publish_task
+from optifeed.utils.rabbitmq import AsyncRabbitPublisher
+
+publisher = AsyncRabbitPublisher()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the RabbitMQ publisher pool on startup and close it on shutdown."""
+    await publisher.start()
+    yield
+    await publisher.close()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 
 @app.post("/webhook")
@@ -13,10 +26,13 @@ async def webhook(request: Request):
     data = await request.json()
     logger.debug(f"🤖 Received webhook: {data}")
 
-    publish_task(
-        {
-            "type": "ask",
-            "data": data,
-        }
-    )
+    try:
+        await publisher.publish(
+            {
+                "type": "ask",
+                "data": data,
+            }
+        )
+    except Exception as e:
+        logger.error(f"❌ Failed to publish task to RabbitMQ: {e}", exc_info=True)
     return JSONResponse(content={"ok": True})
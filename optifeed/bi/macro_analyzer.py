@@ -1,49 +1,169 @@
-from typing import Optional
+from typing import Annotated, Any, Iterable, Iterator, Optional
+
+from pydantic import BaseModel, Field, ValidationError, WithJsonSchema
 
 from optifeed.db.models import AnalyzedNews, NewsItem
-from optifeed.utils.llm import ask_something, parse_json_block
+from optifeed.utils.config import MACRO_BATCH_MAX_CHARS, MACRO_BATCH_SIZE
+from optifeed.utils.llm import ask_something
+from optifeed.utils.llm_executor import LLMExecutor, llm_executor
 from optifeed.utils.logger import logger
 
-
-def analyze_macro(news_item: NewsItem) -> Optional[AnalyzedNews]:
-    """Analyze macroeconomic news and return structured data."""
-    prompt = f"""
-    You are a senior macroeconomic analyst assistant.
-    Given the following news, your task is to analyze its impact on financial markets and return ONLY in valid JSON format like this:
-    {{
-    "impact_score": float between -1 and 1,
-    "magnitude_score": float between 0 and 1,
-    "reasoning": "short explanation (max 5 lines)",
-    "affected_sectors": ["list of sectors or industries"],
-    "affected_companies": ["list of company names or tickers"],
-    "affected_stocks": ["list of tickers or ETFs that could be traded"]
-    }}
-
+ANALYSIS_GUIDELINES = """
     Guidelines:
     - The impact_score reflects whether this is positive (near +1) or negative (near -1) for markets.
     - The magnitude_score reflects how significant this news is (near 1 = major, near 0 = minor).
     - Always provide `affected_sectors` and `affected_stocks`, even if the news doesn't mention any explicitly. Infer reasonable candidates based on the macro context.
     - If there are no explicit companies, propose tickers or ETFs that might be influenced by this type of news (e.g., "SPY", "XLF", "TSLA").
     - Keep the reasoning concise, max 10 lines and in French.
+"""
+
+
+class MacroAnalysis(BaseModel):
+    """Structured answer of the macro analysis prompt."""
+
+    impact_score: float = Field(ge=-1, le=1)
+    magnitude_score: float = Field(ge=0, le=1)
+    reasoning: str = Field(description="Short explanation (max 5 lines)")
+    affected_sectors: list[str] = Field(description="Sectors or industries")
+    affected_companies: list[str] = Field(
+        default_factory=list, description="Company names or tickers"
+    )
+    affected_stocks: list[str] = Field(
+        description="Tickers or ETFs that could be traded"
+    )
+
 
+class MacroBatchAnalysis(MacroAnalysis):
+    """One entry of a batch analysis answer."""
+
+    id: int = Field(description="The news number")
+
+
+# Shown to Gemini with the full schema, but validated entry by entry so one
+# invalid analysis only costs a retry of its own news
+BatchEntry = Annotated[
+    dict[str, Any], WithJsonSchema(MacroBatchAnalysis.model_json_schema())
+]
+
+
+def format_news(news_item: NewsItem) -> str:
+    """Render a news item for an analysis prompt."""
+    return f"""
     Text: {news_item.text}
     Tickers: {news_item.tickers}
+    Themes: {", ".join(news_item.themes)}
     Date: {news_item.date}
     Source: {news_item.source}
     """
+
+
+def to_analyzed_news(news_id: str, analysis: MacroAnalysis) -> AnalyzedNews:
+    """Map an analysis returned by Gemini to an `AnalyzedNews`."""
+    return AnalyzedNews(
+        id=news_id,
+        text=analysis.reasoning,
+        impact_score=analysis.impact_score,
+        magnitude_score=analysis.magnitude_score,
+        affected_sectors=analysis.affected_sectors,
+    )
+
+
+def analyze_macro(news_item: NewsItem) -> Optional[AnalyzedNews]:
+    """Analyze macroeconomic news and return structured data."""
+    prompt = f"""
+    You are a senior macroeconomic analyst assistant.
+    Given the following news, your task is to analyze its impact on financial markets.
+    {ANALYSIS_GUIDELINES}{format_news(news_item)}"""
     try:
-        response = ask_something(prompt).output
-        data = parse_json_block(response)
-        if not data:
-            return None
-
-        return AnalyzedNews(
-            id=news_item.id,
-            text=data.get("reasoning"),
-            impact_score=data.get("impact_score"),
-            magnitude_score=data.get("magnitude_score"),
-            affected_sectors=data.get("affected_sectors"),
-        )
+        analysis = ask_something(
+            prompt, cache=True, output_type=MacroAnalysis, call_site="macro", paced=True
+        ).output
+        return to_analyzed_news(news_item.id, analysis)
     except Exception as e:
         logger.error(f"❌ Gemini API error: {e}")
         return None
+
+
+def batch_news_items(
+    news_items: Iterable[NewsItem],
+    batch_size: int = MACRO_BATCH_SIZE,
+    max_chars: int = MACRO_BATCH_MAX_CHARS,
+) -> Iterator[list[NewsItem]]:
+    """Group news items into batches of at most `batch_size` items and `max_chars` of text."""
+    batch, chars = [], 0
+    for item in news_items:
+        length = len(item.text)
+        if batch and (len(batch) >= batch_size or chars + length > max_chars):
+            yield batch
+            batch, chars = [], 0
+        batch.append(item)
+        chars += length
+    if batch:
+        yield batch
+
+
+def analyze_macro_batch(news_items: list[NewsItem]) -> list[Optional[AnalyzedNews]]:
+    """
+    Analyze several news items in one Gemini call, results in input order.
+    Items missing from the answer, or all of them if it stays invalid after
+    the output retries, are analyzed one by one.
+    """
+    if len(news_items) == 1:
+        return [analyze_macro(news_items[0])]
+
+    # Short ordinals instead of the 64-hex news ids: fewer tokens to echo
+    # back, and nothing for the model to copy wrong
+    news_block = "".join(
+        f"\n    News {number}:{format_news(item)}"
+        for number, item in enumerate(news_items, 1)
+    )
+    prompt = f"""
+    You are a senior macroeconomic analyst assistant.
+    Given the following {len(news_items)} news, your task is to analyze the impact of each one on financial markets.
+    Return one analysis per news, with its number.
+    {ANALYSIS_GUIDELINES}
+    - Analyze each news independently of the others.
+    {news_block}"""
+    results: dict[int, MacroBatchAnalysis] = {}
+    try:
+        response = ask_something(
+            prompt,
+            cache=True,
+            output_type=list[BatchEntry],
+            call_site="macro_batch",
+            paced=True,
+        )
+        for entry in response.output:
+            try:
+                analysis = MacroBatchAnalysis.model_validate(entry)
+                results[analysis.id] = analysis
+            except ValidationError as e:
+                logger.debug(f"Invalid batch entry {entry.get('id')}: {e}")
+    except Exception as e:
+        logger.error(f"❌ Gemini API error: {e}")
+
+    analyses: list[Optional[AnalyzedNews]] = [
+        to_analyzed_news(item.id, results[number]) if number in results else None
+        for number, item in enumerate(news_items, 1)
+    ]
+
+    missing = [idx for idx, analysis in enumerate(analyses) if analysis is None]
+    if missing:
+        logger.warning(
+            f"⚠️ Batch answer missed or invalid for {len(missing)}/{len(news_items)} news, "
+            "falling back to one call per news."
+        )
+        for idx in missing:
+            analyses[idx] = analyze_macro(news_items[idx])
+    return analyses
+
+
+def analyze_macro_many(
+    news_items: list[NewsItem],
+    batch_size: int = MACRO_BATCH_SIZE,
+    executor: LLMExecutor = llm_executor,
+) -> Iterator[tuple[NewsItem, Optional[AnalyzedNews]]]:
+    """Analyze batches of news concurrently, yielding (item, analysis) pairs as they complete."""
+    batches = batch_news_items(news_items, batch_size)
+    for batch, analyses in executor.map(analyze_macro_batch, batches):
+        yield from zip(batch, analyses)
@@ -1,11 +1,21 @@
-from typing import Optional
+from typing import Iterator, Literal, Optional
+
+from pydantic import BaseModel, Field
 
-from optifeed.bi.macro_analyzer import parse_json_block
 from optifeed.db.models import AnalyzedNews, TickerKPIs, TickerTendency
 from optifeed.utils.llm import ask_something
+from optifeed.utils.llm_executor import LLMExecutor, llm_executor
 from optifeed.utils.logger import logger
 
 
+class MicroAnalysis(BaseModel):
+    """Structured answer of the micro analysis prompt."""
+
+    micro_score: float = Field(ge=-1, le=1)
+    rationale: str = Field(description="Short explanation (max 5 lines) in French")
+    suggested_action: Literal["buy", "hold", "sell", "watch"]
+
+
 def analyze_micro(
     news: AnalyzedNews, financial_data: TickerKPIs
 ) -> Optional[TickerTendency]:
@@ -14,10 +24,10 @@ def analyze_micro(
     You are a senior equity analyst assistant.
     Given:
     - This macroeconomic news impact analysis:
-    Text: {news.text}
+    Reasoning: {news.text}
     Impact score: {news.impact_score}
     Magnitude score: {news.magnitude_score}
-    Reasoning: {news.reasoning}
+    Affected sectors: {", ".join(news.affected_sectors) or "N/A"}
     - And these fundamentals for {financial_data.ticker}:
     Company: {financial_data.company_name or "N/A"}
     Market Cap: {financial_data.market_cap or "N/A"}
@@ -26,25 +36,28 @@ def analyze_micro(
     ROE: {financial_data.roe or "N/A"}
     Profit Margin: {financial_data.profit_margin or "N/A"}
     Debt/Equity: {financial_data.debt_equity or "N/A"}
-    Please respond ONLY in this exact JSON format:
-    {{
-    "micro_score": float between -1 and 1,
-    "rationale": "short explanation (max 5 lines) in French",
-    "suggested_action": "buy / hold / sell / watch"
-    }}
+    Estimate the impact of the news on this ticker and suggest an action.
     """
     try:
-        response = ask_something(prompt).output
-        data = parse_json_block(response.text)
-        if not data:
-            return None
+        analysis = ask_something(
+            prompt, cache=True, output_type=MicroAnalysis, call_site="micro", paced=True
+        ).output
         return TickerTendency(
             ticker=financial_data.ticker,
-            micro_score=data.get("micro_score"),
-            rationale=data.get("rationale"),
-            suggested_action=data.get("suggested_action"),
+            micro_score=analysis.micro_score,
+            rationale=analysis.rationale,
+            suggested_action=analysis.suggested_action,
             news_id=news.id,
         )
     except Exception as e:
         logger.error(f"❌ Gemini API error: {e}")
         return None
+
+
+def analyze_micro_many(
+    news: AnalyzedNews,
+    financial_data: list[TickerKPIs],
+    executor: LLMExecutor = llm_executor,
+) -> Iterator[tuple[TickerKPIs, Optional[TickerTendency]]]:
+    """Analyze a news against several tickers concurrently, yielding results as they complete."""
+    return executor.map(lambda kpis: analyze_micro(news, kpis), financial_data)
@@ -1,34 +1,104 @@
 import hashlib
+import html
+import random
 import re
+import struct
+import time
 import unicodedata
-from collections import Counter
+import zlib
+from abc import ABC, abstractmethod
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from html.parser import HTMLParser
+from typing import Optional
 
 import requests
-from bs4 import BeautifulSoup
 from dateutil import parser as date_parser
+from requests.adapters import HTTPAdapter
 
 from optifeed.db.models import NewsItem
-from optifeed.utils.config import BRAVE_API_KEY, DEFAULT_BRAVE_NEWS_LIMIT, FMP_API_KEY
+from optifeed.db.sqlite_utils import (
+    find_news_clusters,
+    prune_news_clusters,
+    save_news_clusters,
+)
+from optifeed.utils.config import (
+    BRAVE_API_KEY,
+    DEFAULT_BRAVE_NEWS_LIMIT,
+    FMP_API_KEY,
+    FMP_PAGE_SIZE,
+    NEWS_CLUSTER_RETENTION_DAYS,
+    NEWS_DUPLICATE_THRESHOLD,
+    NEWS_FETCH_CONCURRENCY,
+    NEWS_LSH_BANDS,
+    NEWS_MAX_PAGES,
+    NEWS_MINHASH_PERMUTATIONS,
+    NEWS_SOURCE_TIMEOUT,
+)
 from optifeed.utils.logger import logger
 
 
 # === Utilities ===
-def clean_html(text):
-    """Remove HTML tags and return plain text."""
-    return BeautifulSoup(text or "", "html.parser").get_text()
+class _TextExtractor(HTMLParser):
+    """Text of an HTML fragment, as BeautifulSoup's get_text would return it."""
 
+    SKIPPED_TAGS = {"script", "style", "template"}
 
-def normalize_text(text):
-    """Normalize text by removing extra spaces and special characters."""
-    text = unicodedata.normalize("NFKC", text or "")
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED_TAGS:
+            self._skipping += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED_TAGS and self._skipping:
+            self._skipping -= 1
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self.parts.append(data)
+
+    def unknown_decl(self, data):
+        if data.startswith("CDATA["):
+            self.handle_data(data[6:])
+
+
+def strip_tags(text: str) -> str:
+    """Remove tags, comments and scripts from HTML and unescape its entities."""
+    parser = _TextExtractor()
+    parser.feed(text)
+    parser.close()
+    return "".join(parser.parts)
+
+
+def clean_text(text: Optional[str]) -> str:
+    """
+    Plain text of an HTML or text fragment: tags stripped, entities unescaped,
+    NFKC-normalized and whitespace collapsed. Text without tags skips the HTML
+    parser, and ASCII text the Unicode normalization.
+    """
+    if not text:
+        return ""
+    if "<" in text:
+        text = strip_tags(text)
+    elif "&" in text:
+        text = html.unescape(text)
+    if not text.isascii():
+        text = unicodedata.normalize("NFKC", text)
+    return " ".join(text.split())
+
+
+TICKER_PATTERN = re.compile(r"\$[A-Z]{1,6}|\b[A-Z]{2,5}:[A-Z]{2,3}\b")
 
 
 def extract_tickers(text):
     """Extract stock tickers from text."""
-    return re.findall(r"\$[A-Z]{1,6}|\b[A-Z]{2,5}:[A-Z]{2,3}\b", text or "")
+    return TICKER_PATTERN.findall(text or "")
 
 
 def hash_event(headline):
@@ -36,32 +106,35 @@ def hash_event(headline):
     return hashlib.sha256(headline.encode()).hexdigest()
 
 
+RELATIVE_AGE_PATTERN = re.compile(r"(\d+)\s+(day|week|hour|minute|second)s?\s+ago")
+
+
+@lru_cache(maxsize=4096)
+def parse_absolute_date(date_str: str) -> Optional[datetime]:
+    """
+    Parse an absolute date string into a UTC datetime. ISO 8601, which
+    covers FMP's dates, is read natively; other formats go to dateutil.
+    """
+    try:
+        dt = datetime.fromisoformat(date_str)
+    except ValueError:
+        try:
+            dt = date_parser.parse(date_str)
+        except Exception:
+            return None
+    return dt.astimezone(timezone.utc)
+
+
 def parse_date(date_str):
-    """Parse date string into a UTC datetime object."""
+    """Parse a date string, absolute or like "2 hours ago", into a UTC datetime."""
     if not date_str:
         return None
-    try:
-        dt = date_parser.parse(date_str)
-        return dt.astimezone(timezone.utc)
-    except Exception:
-        pass
-
-    ago_match = re.match(r"(\d+)\s+(day|week|hour|minute|second)s?\s+ago", date_str)
+    # Relative ages depend on the current time, so they are never cached
+    ago_match = RELATIVE_AGE_PATTERN.match(date_str)
     if ago_match:
-        qty = int(ago_match.group(1))
-        unit = ago_match.group(2)
-        now = datetime.now(timezone.utc)
-        if unit == "day":
-            return now - timedelta(days=qty)
-        elif unit == "week":
-            return now - timedelta(weeks=qty)
-        elif unit == "hour":
-            return now - timedelta(hours=qty)
-        elif unit == "minute":
-            return now - timedelta(minutes=qty)
-        elif unit == "second":
-            return now - timedelta(seconds=qty)
-    return None
+        qty, unit = int(ago_match.group(1)), ago_match.group(2)
+        return datetime.now(timezone.utc) - timedelta(**{f"{unit}s": qty})
+    return parse_absolute_date(date_str)
 
 
 def filter_last_day(news_items):
@@ -70,87 +143,244 @@ def filter_last_day(news_items):
     cutoff = now - timedelta(hours=24)
     filtered = []
     for item in news_items:
-        dt = parse_date(item["published"])
+        dt = item["published_at"]
         if dt and dt >= cutoff:
             filtered.append(item)
     return filtered
 
 
 # === Fetching ===
-def fetch_fmp_news():
-    """Fetch news from Financial Modeling Prep API."""
-    logger.info("Fetching news from Financial Modeling Prep...")
-    url = f"https://financialmodelingprep.com/api/v3/fmp/articles?apikey={FMP_API_KEY}"
-    try:
-        resp = requests.get(url, timeout=10)
-        data = resp.json()
-    except Exception as e:
-        logger.error(f"❌ FMP fetch error: {e}")
-        return []
-    articles = data.get("content", [])
-    logger.info(f"✅ FMP loaded {len(articles)} articles.")
-    return articles
-
-
-def fetch_brave_news():
-    """Fetch news from Brave Search API."""
-    logger.info("Fetching news from Brave Search...")
-    url = "https://api.search.brave.com/res/v1/news/search"
-    headers = {"Accept": "application/json", "x-subscription-token": BRAVE_API_KEY}
-    query = (
-        "earnings OR acquisition OR downgrade OR bankruptcy OR war OR oil OR inflation OR "
-        "fed OR ECB OR recession OR strike OR cyberattack OR terror OR election OR commodities OR climate OR terrorist"
-    )
-    params = {"q": query, "count": DEFAULT_BRAVE_NEWS_LIMIT, "country": "ALL"}
-    try:
-        resp = requests.get(url, headers=headers, params=params, timeout=10)
-        data = resp.json()
-        articles = data.get("results", [])
-    except Exception as e:
-        logger.error(f"❌ Brave fetch error: {e}")
-        return []
-    logger.info(f"✅ Brave loaded {len(articles)} articles.")
-    return articles
-
-
 def build_event(headline, body, published, tickers, source):
-    """Build a news event dictionary."""
+    """
+    Build a news event dictionary from raw HTML or text, cleaned once here.
+    Tickers are those given by the source, or else found in the text, and
+    `published_at` is the publication date parsed into UTC.
+    """
+    headline, body = clean_text(headline), clean_text(body)
     return {
         "headline": headline,
         "body": body,
-        "tickers": tickers or extract_tickers(headline + " " + body),
+        "tickers": tickers or extract_tickers(f"{headline} {body}"),
         "published": published,
+        "published_at": parse_date(published),
         "id": hash_event(headline),
         "source": source,
     }
 
 
-def fetch_all_news():
-    """Fetch news from all sources and return a list of events."""
-    logger.info("Fetching news from all sources...")
-    now_str = datetime.now(timezone.utc).isoformat()
-    events = []
+class NewsSource(ABC):
+    """
+    A news provider. Subclasses request one page of raw items in `request`,
+    read them from the response in `items` and turn each one into an event
+    in `to_event`; `@register_source` adds them to the sources fetched by
+    `fetch_all_news`. Pages are expected newest first.
+    """
+
+    name = "source"
+    timeout = NEWS_SOURCE_TIMEOUT  # Seconds allowed to this source per request
+    max_pages = 1
+
+    @abstractmethod
+    def request(
+        self, session: requests.Session, page: int, headers: dict
+    ) -> requests.Response:
+        """Request one page of raw items, sending `headers` along."""
+
+    @abstractmethod
+    def items(self, response: requests.Response) -> list[dict]:
+        """Raw items of a response page."""
+
+    @abstractmethod
+    def to_event(self, item: dict, now_str: str) -> dict:
+        """Normalize one raw item into a news event."""
+
+    def fetch_events(
+        self, session: requests.Session, watermark: Optional[dict] = None
+    ) -> tuple[list[dict], Optional[dict]]:
+        """
+        Fetch the events published since the watermark, never raising.
+        The first page is requested conditionally and paging stops at the
+        first item already seen. Returns the events and the new watermark,
+        or None when it should stay as it is.
+        """
+        logger.info(f"Fetching news from {self.name}...")
+        watermark = watermark or {}
+        since = parse_date(watermark.get("published_at"))
+        headers = {}
+        if watermark.get("etag"):
+            headers["If-None-Match"] = watermark["etag"]
+        if watermark.get("last_modified"):
+            headers["If-Modified-Since"] = watermark["last_modified"]
+
+        now_str = datetime.now(timezone.utc).isoformat()
+        new_watermark = dict(watermark)
+        events, newest = [], None
+        try:
+            for page in range(self.max_pages):
+                resp = self.request(session, page, headers if page == 0 else {})
+                if page == 0 and resp.status_code == 304:
+                    logger.info(f"✅ {self.name} has no new articles.")
+                    return [], None
+                resp.raise_for_status()
+                if page == 0:
+                    new_watermark["etag"] = resp.headers.get("ETag")
+                    new_watermark["last_modified"] = resp.headers.get("Last-Modified")
+
+                items = self.items(resp)
+                reached = False
+                for item in items:
+                    event = self.to_event(item, now_str)
+                    published = event["published_at"]
+                    if event["id"] == watermark.get("last_id") or (
+                        since and published and published < since
+                    ):
+                        reached = True
+                        continue
+                    events.append(event)
+                    if published and (newest is None or published > newest[0]):
+                        newest = (published, event["id"])
+                if reached or not items:
+                    break
+        except Exception as e:
+            # Keep what was read, but retry from the old watermark next time
+            logger.error(f"❌ {self.name} fetch error: {e}")
+            return events, None
+
+        if newest:
+            new_watermark["published_at"] = newest[0].isoformat()
+            new_watermark["last_id"] = newest[1]
+        logger.info(
+            f"✅ {self.name} loaded {len(events)} new articles in {page + 1} pages."
+        )
+        return events, new_watermark
+
+
+NEWS_SOURCES: dict[str, NewsSource] = {}
+
+
+def register_source(source_cls: type[NewsSource]) -> type[NewsSource]:
+    """Class decorator adding a source to the registry."""
+    NEWS_SOURCES[source_cls.name] = source_cls()
+    return source_cls
 
-    # FMP
-    for item in fetch_fmp_news():
-        headline = clean_html(item.get("title", "No title"))
-        body = clean_html(item.get("content", ""))
+
+@register_source
+class FMPSource(NewsSource):
+    """Articles of Financial Modeling Prep."""
+
+    name = "FMP"
+    max_pages = NEWS_MAX_PAGES
+
+    def request(
+        self, session: requests.Session, page: int, headers: dict
+    ) -> requests.Response:
+        return session.get(
+            "https://financialmodelingprep.com/api/v3/fmp/articles",
+            headers=headers,
+            params={"apikey": FMP_API_KEY, "page": page, "size": FMP_PAGE_SIZE},
+            timeout=self.timeout,
+        )
+
+    def items(self, response: requests.Response) -> list[dict]:
+        return response.json().get("content", [])
+
+    def to_event(self, item: dict, now_str: str) -> dict:
+        headline = item.get("title", "No title")
+        body = item.get("content", "")
         published = item.get("date", now_str)
         source = item.get("link", "FMP")
-        events.append(
-            build_event(headline, body, published, item.get("tickers"), source)
+        return build_event(headline, body, published, item.get("tickers"), source)
+
+
+@register_source
+class BraveSource(NewsSource):
+    """News results of Brave Search for market-moving keywords, from the last day."""
+
+    name = "Brave"
+    query = (
+        "earnings OR acquisition OR downgrade OR bankruptcy OR war OR oil OR inflation OR "
+        "fed OR ECB OR recession OR strike OR cyberattack OR terror OR election OR commodities OR climate OR terrorist"
+    )
+
+    def request(
+        self, session: requests.Session, page: int, headers: dict
+    ) -> requests.Response:
+        return session.get(
+            "https://api.search.brave.com/res/v1/news/search",
+            headers={
+                "Accept": "application/json",
+                "x-subscription-token": BRAVE_API_KEY,
+                **headers,
+            },
+            params={
+                "q": self.query,
+                "count": DEFAULT_BRAVE_NEWS_LIMIT,
+                "country": "ALL",
+                "freshness": "pd",
+                "offset": page,
+            },
+            timeout=self.timeout,
         )
 
-    # Brave
-    for item in fetch_brave_news():
-        headline = clean_html(item.get("title", "No title"))
-        body = clean_html(item.get("description", ""))
+    def items(self, response: requests.Response) -> list[dict]:
+        return response.json().get("results", [])
+
+    def to_event(self, item: dict, now_str: str) -> dict:
+        headline = item.get("title", "No title")
+        body = item.get("description", "")
         published = item.get("age", now_str)
         source = item.get("url", "Brave")
-        events.append(build_event(headline, body, published, None, source))
+        return build_event(headline, body, published, None, source)
+
+
+def create_session(pool_size: int = NEWS_FETCH_CONCURRENCY) -> requests.Session:
+    """HTTP session keeping connections alive between sources and runs."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+session = create_session()
+
+
+def fetch_all_news(
+    sources: Optional[list[NewsSource]] = None,
+    watermarks: Optional[dict[str, dict]] = None,
+) -> tuple[list[dict], dict[str, dict]]:
+    """
+    Fetch the news published since each source's watermark, from all sources
+    concurrently. Returns the events and the watermarks to save once the
+    events are stored.
+    """
+    sources = list(NEWS_SOURCES.values()) if sources is None else sources
+    watermarks = watermarks or {}
+    logger.info(f"Fetching news from {len(sources)} sources...")
+    started = time.monotonic()
+    events, new_watermarks = [], {}
+
+    with ThreadPoolExecutor(
+        max_workers=min(len(sources), NEWS_FETCH_CONCURRENCY) or 1,
+        thread_name_prefix="news",
+    ) as executor:
+        futures = {
+            executor.submit(
+                source.fetch_events, session, watermarks.get(source.name)
+            ): source
+            for source in sources
+        }
+        for future in as_completed(futures):
+            source_events, watermark = future.result()
+            events.extend(source_events)
+            if watermark is not None:
+                new_watermarks[futures[future].name] = watermark
 
-    logger.info(f"✅ Aggregated {len(events)} news items from all sources.")
-    return events
+    logger.info(
+        f"✅ Aggregated {len(events)} news items from all sources "
+        f"in {time.monotonic() - started:.1f}s."
+    )
+    return events, new_watermarks
 
 
 # === Filtering and categorization ===
@@ -163,36 +393,141 @@ THEMES = {
     "central_banks": {"fed", "ecb", "rate hike", "interest rates", "monetary"},
     "war_geo": {
         "war",
+        "warfare",
         "attack",
         "russia",
+        "russian",
         "ukraine",
+        "ukrainian",
         "israel",
+        "israeli",
         "palestine",
+        "palestinian",
         "china",
+        "chinese",
         "taiwan",
+        "taiwanese",
         "iran",
+        "iranian",
     },
     "bankruptcy": {"bankruptcy", "insolvency", "chapter 11"},
     "strikes": {"strike", "union", "protest"},
-    "cyber": {"cyber", "hack", "data breach"},
+    "cyber": {
+        "cyber",
+        "cyberattack",
+        "cybercrime",
+        "cybersecurity",
+        "hack",
+        "data breach",
+    },
     "climate": {"climate", "hurricane", "flood", "wildfire"},
     "elections": {"election", "vote", "ballot"},
 }
 
 
+def trie_regex(words) -> str:
+    """
+    Regex alternation of words factored by common prefixes, so the regex
+    engine tries one branch per character instead of every word.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [
+            re.escape(char) + build(child) for char, child in node.items() if char
+        ]
+        if not branches:
+            return ""
+        optional = "" in node
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        return f"(?:{'|'.join(branches)}){'?' if optional else ''}"
+
+    return build(trie)
+
+
+def inflections(keyword: str) -> set[str]:
+    """
+    The keyword with its plural, verb and agent-noun forms, e.g. "vote",
+    "votes", "voted", "voting", "voter" and "voters".
+    """
+    stem = keyword[:-1] if keyword.endswith("e") else keyword
+    return {keyword, keyword + "s"} | {
+        stem + suffix for suffix in ("ed", "ing", "er", "ers")
+    }
+
+
+class ThemeMatcher:
+    """
+    Matches the keywords of all themes in one pass of a single compiled regex.
+    Keywords match whole words, case-insensitively, in any of their
+    `inflections` ("war" matches "wars" but not "award", "hack" matches
+    "hackers"). Demonyms and compounds are keywords of their own in THEMES.
+    """
+
+    def __init__(self, themes: dict[str, set[str]]):
+        self._keywords = {
+            form: theme
+            for theme, words in themes.items()
+            for keyword in words
+            for form in inflections(keyword.lower())
+        }
+        self._order = {theme: rank for rank, theme in enumerate(themes)}
+        keywords = trie_regex(sorted(self._keywords)).replace(r"\ ", r"\s+")
+        self._pattern = re.compile(rf"\b({keywords})\b", re.IGNORECASE)
+
+    def _theme(self, matched: str) -> Optional[str]:
+        """Theme of the keyword a match of the pattern was found for."""
+        theme = self._keywords.get(" ".join(matched.lower().split()))
+        if theme is None:
+            # The regex folds case further than str.lower(), e.g. "İ" (whose
+            # lower() is two code points) matches "i": find the keyword again
+            theme = next(
+                (
+                    theme
+                    for keyword, theme in self._keywords.items()
+                    if re.fullmatch(
+                        re.escape(keyword).replace(r"\ ", r"\s+"),
+                        matched,
+                        re.IGNORECASE,
+                    )
+                ),
+                None,
+            )
+        return theme
+
+    def match(self, text: str) -> list[str]:
+        """Themes whose keywords appear in the text, in THEMES order."""
+        found = {self._theme(keyword) for keyword in self._pattern.findall(text)}
+        found.discard(None)
+        return sorted(found, key=self._order.__getitem__)
+
+    def match_many(self, texts: list[str]) -> list[list[str]]:
+        """`match` over a batch of texts."""
+        return [self.match(text) for text in texts]
+
+
+theme_matcher = ThemeMatcher(THEMES)
+
+
 def filter_and_categorize(events):
-    """Filter and categorize news events based on predefined themes."""
+    """
+    Keep the news events matching at least one theme of THEMES, with the
+    matched themes attached as `event["themes"]`.
+    """
     filtered = []
     theme_counter = Counter()
 
-    for event in events:
-        text = (event["headline"] + " " + event["body"]).lower()
-        matched = False
-        for theme, keywords in THEMES.items():
-            if any(word in text for word in keywords):
-                theme_counter[theme] += 1
-                matched = True
-        if matched:
+    texts = [event["headline"] + " " + event["body"] for event in events]
+    for event, themes in zip(events, theme_matcher.match_many(texts)):
+        if themes:
+            event["themes"] = themes
+            theme_counter.update(themes)
             filtered.append(event)
 
     logger.info(f"✅ Filtered and categorized {len(filtered)} news items.")
@@ -201,20 +536,119 @@ def filter_and_categorize(events):
 
 
 def preprocess_news(events) -> list[NewsItem]:
-    """Preprocess raw news events into NewsItem objects."""
+    """Turn news events, already cleaned by `build_event`, into NewsItem objects."""
     cleaned_news = []
     for event in events:
-        full_text = normalize_text(event["headline"] + " " + event["body"])
-        tickers = extract_tickers(full_text)
         item = NewsItem(
             id=event["id"],
-            text=full_text,
-            tickers=str(tickers),
-            date=event["published"],
+            text=" ".join(part for part in (event["headline"], event["body"]) if part),
+            tickers=str(event["tickers"]),
+            date=(
+                event["published_at"].isoformat()
+                if event["published_at"]
+                else event["published"]
+            ),
             source=event["source"],
+            headline=event["headline"],
+            themes=event.get("themes", []),
         )
         cleaned_news.append(item)
     logger.info(
         f"✅ Preprocessed {len(cleaned_news)} news items into NewsItem objects."
     )
     return cleaned_news
+
+
+# === Near-duplicate clustering ===
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0)  # Fixed seed: signatures must stay comparable across runs
+PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(_PRIME))
+    for _ in range(NEWS_MINHASH_PERMUTATIONS)
+]
+ROWS_PER_BAND = NEWS_MINHASH_PERMUTATIONS // NEWS_LSH_BANDS
+
+
+def shingles(text: str, size: int = 4) -> set[str]:
+    """Character shingles of the words of a text, which survive small rewordings."""
+    text = " ".join(re.findall(r"\w+", text.lower()))
+    return {text[i : i + size] for i in range(max(len(text) - size + 1, 1))}
+
+
+def minhash(text: str) -> list[int]:
+    """MinHash signature of the shingles of a text."""
+    hashes = [zlib.crc32(shingle.encode()) for shingle in shingles(text)]
+    return [
+        min([(a * h + b) % _PRIME for h in hashes]) & 0xFFFFFFFF
+        for a, b in PERMUTATIONS
+    ]
+
+
+def signature_similarity(a: list[int], b: list[int]) -> float:
+    """Estimated Jaccard similarity of the texts of two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def lsh_keys(signature: list[int]) -> list[int]:
+    """One bucket key per band of the signature; similar texts share a bucket."""
+    keys = []
+    for band in range(NEWS_LSH_BANDS):
+        rows = signature[band * ROWS_PER_BAND : (band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(
+            struct.pack(f"<B{len(rows)}I", band, *rows), digest_size=8
+        ).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+def collapse_near_duplicates(
+    items: list[NewsItem], threshold: float = NEWS_DUPLICATE_THRESHOLD
+) -> list[NewsItem]:
+    """
+    Join each item to the cluster of a recent near-duplicate story, found by
+    MinHash LSH over the headlines, and return the items that start a new
+    cluster. Every item is kept as a cluster member with its source.
+    """
+    prune_news_clusters(NEWS_CLUSTER_RETENTION_DAYS)
+    signatures = [minhash(item.headline or item.text) for item in items]
+    item_keys = [lsh_keys(signature) for signature in signatures]
+
+    # LSH bucket -> clusters in it, as (cluster news id, signature)
+    buckets = defaultdict(list)
+    for key, news_id, signature in find_news_clusters(
+        sorted({key for keys in item_keys for key in keys})
+    ):
+        buckets[key].append(
+            (news_id, list(struct.unpack(f"<{NEWS_MINHASH_PERMUTATIONS}I", signature)))
+        )
+
+    representatives, new_clusters, members = [], [], []
+    for item, signature, keys in zip(items, signatures, item_keys):
+        best, best_score, seen = None, threshold, set()
+        for key in keys:
+            for news_id, cluster_signature in buckets[key]:
+                if news_id in seen:
+                    continue
+                seen.add(news_id)
+                score = signature_similarity(signature, cluster_signature)
+                if score >= best_score:
+                    best, best_score = news_id, score
+
+        if best is None:
+            best = item.id
+            representatives.append(item)
+            new_clusters.append(
+                (item.id, struct.pack(f"<{len(signature)}I", *signature), keys)
+            )
+            for key in keys:
+                buckets[key].append((item.id, signature))
+        else:
+            logger.debug(f"🧩 {item.id[:12]} duplicates {best[:12]} ({best_score:.2f})")
+        members.append((item.id, best, item.source))
+
+    save_news_clusters(new_clusters, members)
+    logger.info(
+        f"✅ {len(items) - len(representatives)} of {len(items)} news items are "
+        "near-duplicates of known stories."
+    )
+    return representatives
@@ -11,6 +11,8 @@ class NewsItem(BaseModel):
     tickers: Optional[str] = None
     date: str
     source: str
+    headline: str = ""
+    themes: List[str] = Field(default_factory=list)
 
 
 class AnalyzedNews(BaseModel):
@@ -1,7 +1,19 @@
+import json
+import os
 import sqlite3
+import struct
+from functools import lru_cache
+from typing import Optional
 
 from optifeed.db.models import AnalyzedNews, NewsItem
-from optifeed.utils.config import SQL_DB_FILE
+from optifeed.utils.bloom import BloomFilter
+from optifeed.utils.config import (
+    SEEN_IDS_ERROR_RATE,
+    SEEN_IDS_FILE,
+    SEEN_IDS_MIN_CAPACITY,
+    SQL_DB_FILE,
+    TELEGRAM_CHAT_ID,
+)
 from optifeed.utils.logger import logger
 
 
@@ -38,22 +50,201 @@ def init_db():
         """
     )
 
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS subscribers (
+            chat_id TEXT PRIMARY KEY,
+            active INTEGER DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS broadcasts (
+            id TEXT PRIMARY KEY,
+            messages TEXT,
+            cursor TEXT,
+            done INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS user_settings (
+            user_id TEXT PRIMARY KEY,
+            answer_cache INTEGER DEFAULT 1
+        )
+        """
+    )
+
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS source_watermarks (
+            source TEXT PRIMARY KEY,
+            published_at TEXT,
+            last_id TEXT,
+            etag TEXT,
+            last_modified TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+    # Near-duplicate clusters, named after the id of their first news item
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS news_clusters (
+            id INTEGER PRIMARY KEY,
+            news_id TEXT UNIQUE,
+            signature BLOB,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS news_cluster_members (
+            news_id TEXT PRIMARY KEY,
+            cluster_news_id TEXT,
+            source TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_news_clusters_created_at "
+        "ON news_clusters(created_at)"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_news_cluster_members_created_at "
+        "ON news_cluster_members(created_at)"
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS news_lsh (
+            key INTEGER,
+            cluster_id INTEGER,
+            PRIMARY KEY (key, cluster_id)
+        ) WITHOUT ROWID
+        """
+    )
+
+    # The default chat always receives alerts
+    if TELEGRAM_CHAT_ID:
+        cur.execute(
+            "INSERT OR IGNORE INTO subscribers (chat_id) VALUES (?)",
+            (str(TELEGRAM_CHAT_ID),),
+        )
+
     conn.commit()
     conn.close()
     logger.info("✅ Database initialized (tables created if not exist).")
 
 
-def is_cached(news_id: str) -> bool:
-    """Check if a news item with the given ID is already cached in `news`."""
-    conn = sqlite3.connect(SQL_DB_FILE)
-    cur = conn.cursor()
-    cur.execute("SELECT 1 FROM news WHERE id = ?", (news_id,))
-    result = cur.fetchone()
-    conn.close()
+class SeenIds:
+    """
+    Bloom filter of the ids in `news`, saved to SEEN_IDS_FILE. Rows inserted
+    after the last save are added back from the table on load, so an id in
+    `news` is never reported as unseen. The filter is rebuilt if the table no
+    longer holds the last row it saw (database restored or replaced).
+    """
+
+    def __init__(self, bloom: BloomFilter, last_rowid: int = 0):
+        self.bloom = bloom
+        self.last_rowid = last_rowid
+
+    def __contains__(self, news_id: str) -> bool:
+        return news_id in self.bloom
+
+    @classmethod
+    def load(cls, path: str = SEEN_IDS_FILE) -> "SeenIds":
+        """Read the saved filter, or build it from `news` if missing or outdated."""
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            (last_rowid,) = struct.unpack_from("<Q", data)
+            seen = cls(BloomFilter.from_bytes(data[8:]), last_rowid)
+            if seen.bloom.error_rate != SEEN_IDS_ERROR_RATE:
+                raise ValueError("the error rate changed")
+        except (OSError, ValueError, struct.error) as e:
+            logger.info(f"Building the seen news ids filter ({e}).")
+            seen = cls(BloomFilter(SEEN_IDS_MIN_CAPACITY, SEEN_IDS_ERROR_RATE))
+
+        conn = sqlite3.connect(SQL_DB_FILE)
+        seen.sync(conn.cursor())
+        conn.close()
+        seen.save(path)
+        return seen
+
+    def sync(self, cur: sqlite3.Cursor):
+        """Add the rows inserted in `news` since the last sync, growing the filter if full."""
+        if self.last_rowid:
+            cur.execute("SELECT id FROM news WHERE rowid = ?", (self.last_rowid,))
+            row = cur.fetchone()
+            if row is None or row[0] not in self.bloom:
+                logger.info("Rebuilding the seen news ids filter (news table changed).")
+                self.bloom = BloomFilter(self.bloom.capacity, SEEN_IDS_ERROR_RATE)
+                self.last_rowid = 0
+
+        cur.execute(
+            "SELECT rowid, id FROM news WHERE rowid > ? ORDER BY rowid",
+            (self.last_rowid,),
+        )
+        for rowid, news_id in cur:
+            self.bloom.add(news_id)
+            self.last_rowid = rowid
+
+        if self.bloom.is_full():
+            # Room for as many ids again as the table holds
+            cur.execute("SELECT MAX(rowid) FROM news")
+            capacity = max(self.bloom.capacity, cur.fetchone()[0]) * 2
+            self.bloom = BloomFilter(capacity, SEEN_IDS_ERROR_RATE)
+            self.last_rowid = 0
+            self.sync(cur)
+            logger.info(
+                f"✅ Resized the seen news ids filter to {self.bloom.capacity}."
+            )
+
+    def save(self, path: str = SEEN_IDS_FILE):
+        """Write the filter atomically, next to where it is read."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(struct.pack("<Q", self.last_rowid) + self.bloom.to_bytes())
+        os.replace(tmp_path, path)
+
+
+@lru_cache(maxsize=1)
+def get_seen_ids() -> SeenIds:
+    """Seen news ids filter, loaded on first use."""
+    return SeenIds.load()
+
+
+def filter_uncached(news_ids: list[str]) -> list[str]:
+    """
+    The ids not yet in `news`, in order. The seen ids filter settles most of
+    them without the DB; possible positives are confirmed with one query.
+    """
+    seen = get_seen_ids()
+    maybe_cached = [news_id for news_id in news_ids if news_id in seen]
+    cached = set()
+    if maybe_cached:
+        conn = sqlite3.connect(SQL_DB_FILE)
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT id FROM news WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps(maybe_cached),),
+        )
+        cached = {row[0] for row in cur.fetchall()}
+        conn.close()
     logger.debug(
-        f"News item with id {news_id} is {'cached' if result else 'not cached'}."
+        f"{len(news_ids) - len(maybe_cached)} of {len(news_ids)} news ids settled "
+        f"by the filter, {len(cached)} of {len(maybe_cached)} others cached."
     )
-    return result is not None
+    return [news_id for news_id in news_ids if news_id not in cached]
 
 
 def save_news_items(news_items: list[NewsItem]):
@@ -72,6 +263,9 @@ def save_news_items(news_items: list[NewsItem]):
         except sqlite3.IntegrityError:
             logger.debug(f"Skipped duplicate news id {item.id}")
     conn.commit()
+    seen = get_seen_ids()
+    seen.sync(cur)
+    seen.save()
     conn.close()
     logger.info(f"✅ Saved {len(news_items)} raw news items.")
 
@@ -152,3 +346,275 @@ def mark_as_sent(news_id: str):
     conn.commit()
     conn.close()
     logger.debug(f"Marked analyzed news id {news_id} as sent.")
+
+
+def add_subscriber(chat_id: str):
+    """Subscribe a chat to alerts, reactivating it if it left before."""
+    conn = sqlite3.connect(SQL_DB_FILE)
+    cur = conn.cursor()
+    cur.execute(
+        """
+        INSERT INTO subscribers (chat_id, active) VALUES (?, 1)
+        ON CONFLICT(chat_id) DO UPDATE SET active = 1
+        """,
+        (str(chat_id),),
+    )
+    conn.commit()
+    conn.close()
+    logger.debug(f"Subscribed chat {chat_id}.")
+
+
+def remove_subscriber(chat_id: str):
+    """Unsubscribe a chat from alerts."""
+    conn = sqlite3.connect(SQL_DB_FILE)
+    cur = conn.cursor()
+    cur.execute("UPDATE subscribers SET active = 0 WHERE chat_id = ?", (str(chat_id),))
+    conn.commit()
+    conn.close()
+    logger.debug(f"Unsubscribed chat {chat_id}.")
+
+
+def get_active_subscribers(after: Optional[str] = None, limit: int = 500) -> list[str]:
+    """Retrieve a page of active subscriber chat ids, ordered, after a cursor."""
+    conn = sqlite3.connect(SQL_DB_FILE)
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT chat_id FROM subscribers
+        WHERE active = 1 AND chat_id > ?
+        ORDER BY chat_id
+        LIMIT ?
+        """,
+        (after or "", limit),
+    )
+    rows = cur.fetchall()
+    conn.close()
+    return [row[0] for row in rows]
+
+
+def start_broadcast(
+    broadcast_id: str, messages: list[str]
+) -> tuple[Optional[str], bool]:
+    """
+    Register a broadcast if it is new and return its progress as
+    (last chat id served, done), so an interrupted broadcast can resume.
+    """
+    conn = sqlite3.connect(SQL_DB_FILE)
+    cur = conn.cursor()
+    cur.execute(
+        "INSERT OR IGNORE INTO broadcasts (id, messages) VALUES (?, ?)",
+        (broadcast_id, json.dumps(messages, ensure_ascii=False)),
+    )
+    conn.commit()
+    cur.execute("SELECT cursor, done FROM broadcasts WHERE id = ?", (broadcast_id,))
+    cursor, done = cur.fetchone()
+    conn.close()
+    return cursor, bool(done)
+
+
+def save_broadcast_progress(broadcast_id: str, cursor: str, done: bool = False):
+    """Checkpoint the last chat id served by a broadcast."""
+    conn = sqlite3.connect(SQL_DB_FILE)
+    cur = conn.cursor()
+    cur.execute(
+        "UPDATE broadcasts SET cursor = ?, done = ? WHERE id = ?",
+        (cursor, int(done), broadcast_id),
+    )
+    conn.commit()
+    conn.close()
+
+
+def set_answer_cache_opt_in(user_id: str, enabled: bool):
+    """Let a user share answers with similar questions of others, or opt out."""
+    conn = sqlite3.connect(SQL_DB_FILE)
+    cur = conn.cursor()
+    cur.execute(
+        """
+        INSERT INTO user_settings (user_id, answer_cache) VALUES (?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET answer_cache = excluded.answer_cache
+        """,
+        (str(user_id), int(enabled)),
+    )
+    conn.commit()
+    conn.close()
+    logger.debug(f"Set answer cache to {enabled} for user {user_id}.")
+
+
+def is_answer_cache_enabled(user_id: str) -> bool:
+    """Whether a user takes part in the answer cache; users are in by default."""
+    conn = sqlite3.connect(SQL_DB_FILE)
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT answer_cache FROM user_settings WHERE user_id = ?", (str(user_id),)
+    )
+    row = cur.fetchone()
+    conn.close()
+    return row is None or bool(row[0])
+
+
+def get_source_watermarks() -> dict[str, dict]:
+    """Watermark of every news source, by source name."""
+    conn = sqlite3.connect(SQL_DB_FILE)
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT source, published_at, last_id, etag, last_modified FROM source_watermarks"
+    )
+    rows = cur.fetchall()
+    conn.close()
+    return {
+        source: {
+            "published_at": published_at,
+            "last_id": last_id,
+            "etag": etag,
+            "last_modified": last_modified,
+        }
+        for source, published_at, last_id, etag, last_modified in rows
+    }
+
+
+def save_source_watermarks(watermarks: dict[str, dict]):
+    """Commit the watermarks reached by a fetch, once its news items are saved."""
+    conn = sqlite3.connect(SQL_DB_FILE)
+    cur = conn.cursor()
+    cur.executemany(
+        """
+        INSERT INTO source_watermarks (source, published_at, last_id, etag, last_modified)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(source) DO UPDATE SET
+            published_at = excluded.published_at,
+            last_id = excluded.last_id,
+            etag = excluded.etag,
+            last_modified = excluded.last_modified,
+            updated_at = CURRENT_TIMESTAMP
+        """,
+        [
+            (
+                source,
+                watermark.get("published_at"),
+                watermark.get("last_id"),
+                watermark.get("etag"),
+                watermark.get("last_modified"),
+            )
+            for source, watermark in watermarks.items()
+        ],
+    )
+    conn.commit()
+    conn.close()
+    logger.info(f"✅ Saved watermarks of {len(watermarks)} news sources.")
+
+
+def find_news_clusters(keys: list[int]) -> list[tuple[int, str, bytes]]:
+    """Clusters sharing an LSH bucket with the keys, as (key, news id, signature)."""
+    conn = sqlite3.connect(SQL_DB_FILE)
+    cur = conn.cursor()
+    rows = []
+    # Stay under the bound parameters limit of older SQLite builds
+    for i in range(0, len(keys), 500):
+        chunk = keys[i : i + 500]
+        cur.execute(
+            f"""
+            SELECT l.key, c.news_id, c.signature
+            FROM news_lsh l JOIN news_clusters c ON c.id = l.cluster_id
+            WHERE l.key IN ({",".join("?" * len(chunk))})
+            """,
+            chunk,
+        )
+        rows.extend(cur.fetchall())
+    conn.close()
+    return rows
+
+
+def save_news_clusters(
+    clusters: list[tuple[str, bytes, list[int]]], members: list[tuple[str, str, str]]
+):
+    """
+    Store new clusters as (news id, signature, LSH keys) and cluster members
+    as (news id, cluster news id, source).
+    """
+    conn = sqlite3.connect(SQL_DB_FILE)
+    cur = conn.cursor()
+    for news_id, signature, keys in clusters:
+        cur.execute(
+            "INSERT OR IGNORE INTO news_clusters (news_id, signature) VALUES (?, ?)",
+            (news_id, signature),
+        )
+        if cur.rowcount:
+            cluster_id = cur.lastrowid
+            cur.executemany(
+                "INSERT OR IGNORE INTO news_lsh (key, cluster_id) VALUES (?, ?)",
+                [(key, cluster_id) for key in keys],
+            )
+    cur.executemany(
+        """
+        INSERT OR IGNORE INTO news_cluster_members (news_id, cluster_news_id, source)
+        VALUES (?, ?, ?)
+        """,
+        members,
+    )
+    conn.commit()
+    conn.close()
+
+
+def prune_news_clusters(days: int):
+    """Stop matching new items against clusters created more than `days` ago."""
+    conn = sqlite3.connect(SQL_DB_FILE)
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT id FROM news_clusters WHERE created_at < datetime('now', ?)
+        ORDER BY created_at DESC LIMIT 1
+        """,
+        (f"-{days} days",),
+    )
+    row = cur.fetchone()
+    if row:
+        (last_id,) = row
+        # Cluster ids grow with time, so older clusters are those up to last_id
+        cur.execute("DELETE FROM news_lsh WHERE cluster_id <= ?", (last_id,))
+        cur.execute("DELETE FROM news_clusters WHERE id <= ?", (last_id,))
+        logger.info(f"🧹 Pruned news clusters older than {days} days.")
+    conn.commit()
+    conn.close()
+
+
+def get_near_duplicate_counts(days: int = 7) -> dict[str, int]:
+    """News items collapsed into an earlier story, per day: the analyses saved."""
+    conn = sqlite3.connect(SQL_DB_FILE)
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT date(created_at), COUNT(*) FROM news_cluster_members
+        WHERE news_id != cluster_news_id AND created_at >= datetime('now', ?)
+        GROUP BY 1 ORDER BY 1
+        """,
+        (f"-{days} days",),
+    )
+    rows = cur.fetchall()
+    conn.close()
+    return dict(rows)
+
+
+def get_unanalyzed_stories(days: int) -> list[NewsItem]:
+    """
+    News items that started a story in the last `days` days but have no
+    analysis yet, e.g. because Gemini failed on them in an earlier run.
+    """
+    conn = sqlite3.connect(SQL_DB_FILE)
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT n.id, n.text, n.tickers, n.date, n.source
+        FROM news_clusters c
+        JOIN news n ON n.id = c.news_id
+        LEFT JOIN analyzed_news a ON a.id = c.news_id
+        WHERE a.id IS NULL AND c.created_at >= datetime('now', ?)
+        ORDER BY c.created_at
+        """,
+        (f"-{days} days",),
+    )
+    rows = cur.fetchall()
+    conn.close()
+    return [
+        NewsItem(id=row[0], text=row[1], tickers=row[2], date=row[3], source=row[4])
+        for row in rows
+    ]
@@ -1,16 +1,22 @@
-from optifeed.bi.macro_analyzer import analyze_macro
+from optifeed.bi.macro_analyzer import analyze_macro_many
 from optifeed.bi.news import (
+    collapse_near_duplicates,
     fetch_all_news,
     filter_and_categorize,
     filter_last_day,
     preprocess_news,
 )
 from optifeed.db.sqlite_utils import (
+    filter_uncached,
+    get_near_duplicate_counts,
+    get_source_watermarks,
+    get_unanalyzed_stories,
     init_db,
-    is_cached,
     save_analyzed_news,
     save_news_items,
+    save_source_watermarks,
 )
+from optifeed.utils.config import NEWS_ANALYSIS_RETRY_DAYS
 from optifeed.utils.logger import logger
 from optifeed.worker.tasks import detect_signals_and_push
 
@@ -21,8 +27,8 @@ def main():
     # Init DB
     init_db()
 
-    # Fetch fresh news
-    news_items = fetch_all_news()
+    # Fetch the news published since the last run
+    news_items, watermarks = fetch_all_news(watermarks=get_source_watermarks())
     logger.info(f"✅ Fetched {len(news_items)} raw news items.")
 
     # Filter for last 24 hours
@@ -36,24 +42,42 @@ def main():
     processed_news = preprocess_news(categorized_news)
 
     # Filter out duplicates
-    new_items = [item for item in processed_news if not is_cached(item.id)]
+    new_ids = set(filter_uncached([item.id for item in processed_news]))
+    new_items = [item for item in processed_news if item.id in new_ids]
     logger.info(f"✅ {len(new_items)} new items after deduplication.")
 
     # Save to raw news table
     save_news_items(new_items)
     logger.info(f"✅ Saved {len(new_items)} new items to the news table.")
 
+    # Only now may the next run skip what was fetched
+    save_source_watermarks(watermarks)
+
+    # Stories saved by an earlier run whose analysis failed
+    retries = get_unanalyzed_stories(NEWS_ANALYSIS_RETRY_DAYS)
+    if retries:
+        logger.info(f"🔁 Retrying the analysis of {len(retries)} stories.")
+
+    # Analyze each story once, however many sources carry it
+    stories = retries + collapse_near_duplicates(new_items)
+
     # Analyze with Gemini and save to analyzed_news table
     analyzed_count = 0
-    for item in new_items:
-        analysis = analyze_macro(item)
+    for item, analysis in analyze_macro_many(stories):
+        if analysis is None:
+            logger.warning(f"⚠️ Could not analyze {item.id}, retrying next run.")
+            continue
         save_analyzed_news(analysis)
         analyzed_count += 1
         logger.success(
-            f"✅ Analyzed {item.id} with magnitude {analysis.magnitude_score:.2f}, "
+            f"✅ Analyzed {item.id} with magnitude {analysis.magnitude_score or 0:.2f}"
         )
 
     logger.info(f"🎯 Analysis completed. Total analyzed: {analyzed_count}.")
+    logger.info(
+        "🧩 Analyses saved by near-duplicate clustering: "
+        + ", ".join(f"{day}: {n}" for day, n in get_near_duplicate_counts().items())
+    )
 
     # Now detect signals & publish alerts
     detect_signals_and_push()
@@ -2,6 +2,7 @@ import base64
 import html
 import json
 import re
+from datetime import date
 from typing import List
 
 from google.oauth2.credentials import Credentials
@@ -11,7 +12,8 @@ from googleapiclient.errors import HttpError
 from optifeed.utils.config import GMAIL_CREDENTIALS_FILE, GMAIL_SCOPES, GMAIL_TOKEN_FILE
 from optifeed.utils.llm import ask_something
 from optifeed.utils.logger import logger
-from optifeed.utils.rabbitmq import publish_task
+from optifeed.utils.rabbitmq import publish_tasks
+from optifeed.worker.fanout import broadcast_id_for
 
 
 def create_service(
@@ -134,7 +136,7 @@ def summarize_emails_with_gemini(contents: str) -> str:
     {contents}
     """
     try:
-        response = ask_something(prompt).output
+        response = ask_something(prompt, cache=True, call_site="daily_summary").output
         return response.strip()
     except Exception as e:
         logger.error(f"❌ Gemini API error: {e}")
@@ -157,13 +159,23 @@ def main():
     full_content = "\n\n".join(cleaned_contents)
 
     summary = summarize_emails_with_gemini(full_content)
-
-    publish_task(
-        {
-            "type": "alert",
-            "message": summary,
-        }
+    # Scoped to the day: the same digest (e.g. the fallback error) is sent
+    # again tomorrow, while a rerun today still resumes instead of resending
+    broadcast_id = f"daily-summary-{date.today()}-{broadcast_id_for([summary])[:12]}"
+
+    failed = publish_tasks(
+        [
+            {
+                "type": "alert",
+                "message": summary,
+                "broadcast": True,
+                "broadcast_id": broadcast_id,
+            }
+        ]
     )
+    if failed:
+        logger.error("❌ Daily summary not published, emails left unread for retry.")
+        return
 
     client.mark_as_read(email_ids)
 
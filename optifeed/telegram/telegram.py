@@ -1,9 +1,25 @@
 import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 
-from optifeed.utils.config import TELEGRAM_CHAT_ID, TELEGRAM_TOKEN
+from optifeed.utils.config import (
+    TELEGRAM_API_URL,
+    TELEGRAM_CHAT_ID,
+    TELEGRAM_CHAT_RATE,
+    TELEGRAM_GLOBAL_RATE,
+    TELEGRAM_GROUP_RATE,
+    TELEGRAM_MAX_RETRIES,
+    TELEGRAM_SEND_CONCURRENCY,
+    TELEGRAM_TOKEN,
+)
 from optifeed.utils.logger import logger
+from optifeed.utils.rate_limit import TokenBucket
 
 
 def escape_markdown_v2(text: str) -> str:
@@ -11,31 +27,193 @@ def escape_markdown_v2(text: str) -> str:
     return re.sub(f"([{re.escape(escape_chars)}])", r"\\\1", text)
 
 
-def send_telegram_message(message: str, parse_mode: str = "MarkdownV2"):
-    """
-    Sends a Telegram message via the Bot HTTP API using predefined TOKEN and CHAT_ID.
-    Supports optional parse_mode ("MarkdownV2", "HTML", etc.).
-    """
-    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-
+def build_message_payload(
+    chat_id, message: str, parse_mode: Optional[str] = "MarkdownV2"
+) -> dict:
+    """Build a sendMessage payload, escaping the text for MarkdownV2."""
     if parse_mode == "MarkdownV2":
         message = escape_markdown_v2(message)
 
     payload = {
-        "chat_id": str(TELEGRAM_CHAT_ID),
+        "chat_id": str(chat_id),
         "text": message,
-        "parse_mode": parse_mode,
     }
+    if parse_mode:
+        payload["parse_mode"] = parse_mode
+    return payload
+
+
+class TelegramSender:
+    """
+    Outbound Bot API client shared by every thread of the process.
+    Keeps connections alive, rate limits per chat and globally, and waits
+    for `retry_after` when Telegram answers 429.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = TELEGRAM_GLOBAL_RATE,
+        chat_rate: float = TELEGRAM_CHAT_RATE,
+        group_rate: float = TELEGRAM_GROUP_RATE,
+        concurrency: int = TELEGRAM_SEND_CONCURRENCY,
+        max_retries: int = TELEGRAM_MAX_RETRIES,
+    ):
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self._global_bucket = TokenBucket(global_rate)
+        self._chat_buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _chat_bucket(self, chat_id: str) -> TokenBucket:
+        """Return the bucket of a chat; group chat ids are negative."""
+        with self._lock:
+            bucket = self._chat_buckets.get(chat_id)
+            if bucket is None:
+                rate = self.group_rate if chat_id.startswith("-") else self.chat_rate
+                bucket = TokenBucket(rate, capacity=1)
+                self._chat_buckets[chat_id] = bucket
+            return bucket
+
+    def call(self, method: str, payload: dict) -> dict:
+        """POST a Bot API method within the rate limits and return its JSON."""
+        url = f"{TELEGRAM_API_URL}/bot{TELEGRAM_TOKEN}/{method}"
+        chat_bucket = self._chat_bucket(str(payload.get("chat_id", "")))
+
+        for _ in range(self.max_retries + 1):
+            chat_bucket.acquire()
+            self._global_bucket.acquire()
+            try:
+                response = self.session.post(url, json=payload, timeout=5)
+            except requests.RequestException as e:
+                logger.error(f"❌ Failed to call Telegram {method}: {e}", exc_info=True)
+                return {"ok": False, "error": str(e)}
+
+            if response.status_code == 429:
+                retry_after = self._retry_after(response)
+                logger.warning(
+                    f"⚠️ Telegram rate limited chat {payload.get('chat_id')}, "
+                    f"retrying in {retry_after}s"
+                )
+                chat_bucket.pause(retry_after)
+                continue
+
+            if not response.ok:
+                logger.error(f"❌ Telegram API error response: {response.text}")
+                try:
+                    return response.json()  # {"ok": false, "error_code": ...}
+                except ValueError:
+                    return {"ok": False, "error": response.text}
+            return response.json()
+
+        return {"ok": False, "error": "Too many requests"}
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> float:
+        """Read the `retry_after` hint of a 429 response."""
+        try:
+            return float(response.json()["parameters"]["retry_after"])
+        except (ValueError, KeyError, TypeError):
+            return 1.0
+
+    def send_message(
+        self, chat_id, message: str, parse_mode: Optional[str] = "MarkdownV2"
+    ) -> dict:
+        """Send one message to a chat."""
+        response = self.call(
+            "sendMessage", build_message_payload(chat_id, message, parse_mode)
+        )
+        if response.get("ok"):
+            logger.info(f"✅ Sent Telegram message: {message[:60]}...")
+        return response
+
+    def send_many(
+        self,
+        messages: Iterable[tuple[str, str]],
+        parse_mode: Optional[str] = "MarkdownV2",
+    ) -> list[dict]:
+        """
+        Send many (chat_id, message) pairs and return the responses in order.
+        Each chat is scheduled on its own: it sends its next message, then
+        queues up again behind the other chats. A chat keeps its order, and
+        one waiting on its rate limit or a 429 never holds up the others.
+        """
+        messages = list(messages)
+        by_chat: dict[str, deque[int]] = {}
+        for idx, (chat_id, _) in enumerate(messages):
+            by_chat.setdefault(str(chat_id), deque()).append(idx)
+
+        responses: list[dict] = [{}] * len(messages)
+        chats_left = len(by_chat)
+        all_sent = threading.Event()
+        lock = threading.Lock()
+
+        def send_next(chat_id: str):
+            nonlocal chats_left
+            indexes = by_chat[chat_id]
+            idx = indexes.popleft()
+            try:
+                responses[idx] = self.send_message(*messages[idx], parse_mode)
+            except Exception as e:
+                logger.error(f"❌ Failed to send to chat {chat_id}: {e}")
+            if indexes:
+                executor.submit(send_next, chat_id)
+                return
+            with lock:
+                chats_left -= 1
+                if not chats_left:
+                    all_sent.set()
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for chat_id in by_chat:
+                executor.submit(send_next, chat_id)
+            if by_chat:
+                all_sent.wait()
+
+        sent = sum(1 for response in responses if response.get("ok"))
+        logger.info(
+            f"📨 Bulk sent {sent}/{len(messages)} messages to {len(by_chat)} chats "
+            f"in {time.monotonic() - started:.1f}s"
+        )
+        return responses
+
+
+sender = TelegramSender()
+
+
+def send_telegram_message(
+    message: str, parse_mode: Optional[str] = "MarkdownV2", chat_id=None
+):
+    """
+    Sends a Telegram message via the Bot HTTP API, to CHAT_ID by default.
+    Supports optional parse_mode ("MarkdownV2", "HTML", etc.), None for plain text.
+    """
+    return sender.send_message(chat_id or TELEGRAM_CHAT_ID, message, parse_mode)
+
+
+def send_telegram_messages(
+    messages: list[str], parse_mode: Optional[str] = "MarkdownV2", chat_id=None
+) -> list[dict]:
+    """Send several messages, in order, to CHAT_ID by default."""
+    chat_id = chat_id or TELEGRAM_CHAT_ID
+    return sender.send_many(((chat_id, m) for m in messages), parse_mode)
+
+
+def edit_telegram_message(
+    message_id: int, message: str, parse_mode: Optional[str] = None, chat_id=None
+):
+    """Replace the text of a message previously sent to CHAT_ID by default."""
+    payload = build_message_payload(chat_id or TELEGRAM_CHAT_ID, message, parse_mode)
+    payload["message_id"] = message_id
 
-    try:
-        response = requests.post(url, json=payload, timeout=5)
-        response.raise_for_status()
-        json_response = response.json()
-        logger.info(f"✅ Sent Telegram message: {message[:60]}...")
-        return json_response
-    except requests.RequestException as e:
-        logger.error(f"❌ Failed to send Telegram message: {e}", exc_info=True)
-        return {"ok": False, "error": str(e)}
-    except requests.HTTPError as e:
-        logger.error("❌ Telegram API error response: %s", response.text)
-        raise
+    response = sender.call("editMessageText", payload)
+    if response.get("ok"):
+        logger.debug(f"✏️ Edited Telegram message {message_id}.")
+    return response
@@ -0,0 +1,62 @@
+import hashlib
+import math
+import struct
+
+_HEADER = struct.Struct("<4sQdQ")  # Magic, capacity, error rate, count
+_MAGIC = b"BLM1"
+
+
+class BloomFilter:
+    """
+    Set membership without false negatives: `key in bloom` is False only for
+    keys never added, and wrongly True for about `error_rate` of the others
+    while at most `capacity` keys are added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(
+            8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(
+            bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+    def is_full(self) -> bool:
+        """Whether more keys would push the error rate above `error_rate`."""
+        return self.count >= self.capacity
+
+    def to_bytes(self) -> bytes:
+        header = _HEADER.pack(_MAGIC, self.capacity, self.error_rate, self.count)
+        return header + bytes(self._bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        magic, capacity, error_rate, count = _HEADER.unpack_from(data)
+        bloom = cls(capacity, error_rate)
+        bits = data[_HEADER.size :]
+        if magic != _MAGIC or len(bits) != len(bloom._bits):
+            raise ValueError("Not a Bloom filter of this version")
+        bloom._bits[:] = bits
+        bloom.count = count
+        return bloom
@@ -11,6 +11,15 @@ BRAVE_API_KEY = os.getenv("BRAVE_API_KEY")
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 TELEGRAM_BOT_USERNAME = "@macro_hedge_bot"
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+
+# Telegram send limits (messages per second), see the Bot API FAQ
+TELEGRAM_GLOBAL_RATE = 30  # Across all chats
+TELEGRAM_CHAT_RATE = 1  # In a single private chat
+TELEGRAM_GROUP_RATE = 20 / 60  # In a single group
+TELEGRAM_SEND_CONCURRENCY = 8  # Parallel chats in a bulk send
+TELEGRAM_MAX_RETRIES = 3  # Attempts after a 429 before giving up
+FANOUT_BATCH_SIZE = 500  # Subscribers served per checkpoint of a broadcast
 
 # Gmail API configuration
 GMAIL_SCOPES = ["https://www.googleapis.com/auth/gmail.modify"]
@@ -18,12 +27,33 @@ GMAIL_TOKEN_FILE = os.getenv("GMAIL_TOKEN_FILE")
 GMAIL_CREDENTIALS_FILE = "credentials.json"
 
 DEFAULT_BRAVE_NEWS_LIMIT = 30
+NEWS_SOURCE_TIMEOUT = 10  # Seconds per request to a news source
+NEWS_FETCH_CONCURRENCY = 16  # News sources fetched in parallel
+NEWS_MAX_PAGES = 5  # Pages read per source and run when no watermark stops earlier
+FMP_PAGE_SIZE = 50
+
+# Near-duplicate news clustering
+NEWS_DUPLICATE_THRESHOLD = 0.6  # Estimated Jaccard similarity of headline shingles
+NEWS_MINHASH_PERMUTATIONS = 64
+NEWS_LSH_BANDS = 16  # Bands of the MinHash signature, each an LSH bucket
+NEWS_CLUSTER_RETENTION_DAYS = 7  # Stories older than this are no longer matched
+NEWS_ANALYSIS_RETRY_DAYS = 1  # Stories whose analysis failed are retried this long
+
+# Seen news ids
+SEEN_IDS_ERROR_RATE = float(os.getenv("SEEN_IDS_ERROR_RATE", "0.01"))
+SEEN_IDS_MIN_CAPACITY = 100_000  # Ids the filter holds before it is resized
 
 # Directories
-DATA_DIR = os.path.join(os.path.dirname(__file__), "../..", "data")
+DATA_DIR = os.getenv(
+    "DATA_DIR", os.path.join(os.path.dirname(__file__), "../..", "data")
+)
 SQL_DB_FILE = os.path.join(DATA_DIR, "news.db")
 LOG_DIR = os.path.join(os.path.dirname(__file__), "../..", "logs")
 LOG_FILE = os.path.join(LOG_DIR, "bot.log")
+HISTORY_DB_FILE = os.path.join(DATA_DIR, "history.db")
+LLM_CACHE_DB_FILE = os.path.join(DATA_DIR, "llm_cache.db")
+LLM_METRICS_DB_FILE = os.path.join(DATA_DIR, "llm_metrics.db")
+SEEN_IDS_FILE = os.path.join(DATA_DIR, "seen_ids.bloom")
 
 # Ensure directories exist
 os.makedirs(DATA_DIR, exist_ok=True)
@@ -33,9 +63,73 @@ os.makedirs(LOG_DIR, exist_ok=True)
 RABBIT_HOST = os.getenv("RABBIT_HOST")
 RABBIT_USER = os.getenv("RABBIT_USER")
 RABBIT_PASS = os.getenv("RABBIT_PASS")
+RABBIT_HEARTBEAT = 60  # Seconds between AMQP heartbeats on long-lived connections
+RABBIT_PUBLISHER_POOL_SIZE = int(os.getenv("RABBIT_PUBLISHER_POOL_SIZE", "2"))
+RABBIT_PUBLISH_BATCH_SIZE = 100  # Messages acknowledged together by the broker
+
+# Worker lanes: unacked tasks in flight and parallel workers per queue
+ALERT_WORKER_CONCURRENCY = int(os.getenv("ALERT_WORKER_CONCURRENCY", "2"))
+# Broadcasts run for minutes: a prefetched alert waiting behind them could
+# stay unacked past RabbitMQ's consumer_timeout, so prefetch only what runs
+ALERT_WORKER_PREFETCH = int(
+    os.getenv("ALERT_WORKER_PREFETCH", str(ALERT_WORKER_CONCURRENCY))
+)
+ASK_WORKER_PREFETCH = int(os.getenv("ASK_WORKER_PREFETCH", "16"))
+ASK_WORKER_CONCURRENCY = int(os.getenv("ASK_WORKER_CONCURRENCY", "4"))
+# Questions of one user waiting behind their running one; more are turned
+# down, so a burst cannot fill the prefetch window and stall other users
+ASK_WORKER_MAX_QUEUED_PER_USER = int(os.getenv("ASK_WORKER_MAX_QUEUED_PER_USER", "3"))
+LANE_DEPTH_LOG_INTERVAL = 60  # Seconds between queue depth logs
 
 # LLM
 DEFAULT_LLM_MODEL = "gemini-2.5-flash-lite-preview-06-17"
+LLM_LARGE_MODEL = os.getenv("LLM_LARGE_MODEL", "gemini-2.5-flash")
+# Model tiers of the ask path: (max prompt + history chars, model), smallest first
+LLM_MODEL_TIERS = [
+    (int(os.getenv("LLM_LARGE_PROMPT_CHARS", "3000")), DEFAULT_LLM_MODEL),
+    (None, LLM_LARGE_MODEL),
+]
+# Hedged asks: a second request is sent if the first is slower than the usual p95
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+LLM_HEDGE_DEFAULT_DELAY = 8.0  # Seconds, until enough latencies are known
+LLM_HEDGE_MIN_SAMPLES = 20  # Latencies needed before trusting the observed p95
+MACRO_BATCH_SIZE = int(os.getenv("MACRO_BATCH_SIZE", "10"))  # News per analysis call
+MACRO_BATCH_MAX_CHARS = 20_000  # Cap on the news text packed into one call
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))  # Parallel analysis calls
+# Pace of the pipeline's bulk analysis, per process; interactive asks are not paced
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "15"))
+LLM_MAX_RETRIES = 4  # Attempts after a 429/5xx before giving up
+LLM_RETRY_BASE_DELAY = 1.0  # Seconds, doubled on every retry then jittered
+LLM_RETRY_MAX_DELAY = 30.0
+LLM_OUTPUT_RETRIES = 2  # Re-asks when a structured answer fails validation
+# USD per million (input, output) tokens, for cost estimates in the LLM report
+LLM_PRICES = {
+    DEFAULT_LLM_MODEL: (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+}
+
+# LLM response cache, used by calls that opt in with `cache=True`
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_TTL_SECONDS = 30 * 24 * 3600  # Cached answers older than this are stale
+LLM_CACHE_MAX_ENTRIES = 10_000  # Least recently used answers are evicted past this
+
+# Conversation history
+HISTORY_BACKEND = os.getenv("HISTORY_BACKEND", "sqlite")  # "sqlite" or "memory"
+HISTORY_TTL_SECONDS = 7 * 24 * 3600  # Forget users idle for longer than this
+HISTORY_CACHE_SIZE = 1000  # Decoded histories kept in the in-process LRU
+HISTORY_EVICT_INTERVAL = 3600  # Seconds between idle history sweeps
+HISTORY_SUMMARY_MAX_CHARS = 800  # Cap on the rolling summary of evicted turns
+
+# Answer cache: recent answers are reused for similar questions of any user
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_TTL_SECONDS = 15 * 60  # Market answers go stale quickly
+ANSWER_CACHE_THRESHOLD = 0.85  # Minimum cosine similarity between two questions
+ANSWER_CACHE_MAX_ENTRIES = 500
+ANSWER_CACHE_DIMENSIONS = 2**14  # Size of the hashed question vectors
+
+# Streaming replies: first tokens are sent early, then the message is edited
+STREAM_REPLIES = os.getenv("STREAM_REPLIES", "false").lower() == "true"
+STREAM_EDIT_INTERVAL = 1.0  # Minimum seconds between two edits of a reply
 
 # Telegram admin user
 ADMIN_USER = os.getenv("ADMIN_USER")
@@ -1,14 +1,29 @@
-import json
-import re
-from typing import Optional
+import asyncio
+import queue
+import time
+from functools import lru_cache
+from typing import Callable, Optional, Union
 
+from pydantic import TypeAdapter
 from pydantic_ai import Agent
 from pydantic_ai.agent import AgentRunResult
 from pydantic_ai.messages import ModelMessage
-from pydantic_ai.models.google import GoogleModel
-from pydantic_ai.providers.google import GoogleProvider
+from pydantic_ai.models import Model
+from pydantic_ai.usage import Usage
 
-from optifeed.utils.config import DEFAULT_LLM_MODEL, GOOGLE_API_KEY
+from optifeed.utils.config import (
+    DEFAULT_LLM_MODEL,
+    GOOGLE_API_KEY,
+    LLM_CACHE_ENABLED,
+    LLM_HEDGE_DEFAULT_DELAY,
+    LLM_HEDGE_ENABLED,
+    LLM_MODEL_TIERS,
+    LLM_OUTPUT_RETRIES,
+)
+from optifeed.utils.llm_cache import CachedRunResult, cache_key, get_response_cache
+from optifeed.utils.llm_executor import llm_executor
+from optifeed.utils.llm_loop import get_llm_loop
+from optifeed.utils.llm_metrics import get_llm_metrics
 from optifeed.utils.logger import logger
 
 INSTRUCTION_PROMPT = """
@@ -18,24 +33,286 @@ If the question is not clear, ask for clarification.
 Don't use fancy format.
 """
 
-PROVIDER = GoogleProvider(api_key=GOOGLE_API_KEY)
-MODEL = GoogleModel(model_name=DEFAULT_LLM_MODEL, provider=PROVIDER)
+
+@lru_cache(maxsize=1)
+def get_provider():
+    """
+    Gemini provider, built on first use and shared so its HTTP client stays
+    warm. Its connections belong to the LLM loop: only use it from there.
+    """
+    from pydantic_ai.providers.google import GoogleProvider
+
+    return GoogleProvider(api_key=GOOGLE_API_KEY)
+
+
+@lru_cache(maxsize=None)
+def get_model(model_name: str = DEFAULT_LLM_MODEL) -> Model:
+    """Gemini model by name, built on first use."""
+    from pydantic_ai.models.google import GoogleModel
+
+    return GoogleModel(model_name=model_name, provider=get_provider())
+
+
+@lru_cache(maxsize=None)
+def get_agent(
+    model_name: str = DEFAULT_LLM_MODEL,
+    instructions: str = INSTRUCTION_PROMPT,
+    output_type: type = str,
+    output_retries: int = LLM_OUTPUT_RETRIES,
+) -> Agent:
+    """Agent registry: one shared agent per model, instructions and output type."""
+    return Agent(
+        model=get_model(model_name),
+        instructions=instructions,
+        output_type=output_type,
+        output_retries=output_retries,
+    )
+
+
+def select_model(prompt_chars: int) -> str:
+    """Pick the smallest model tier whose prompt budget fits the prompt and history."""
+    for max_chars, model_name in LLM_MODEL_TIERS:
+        if max_chars is None or prompt_chars <= max_chars:
+            return model_name
+    return DEFAULT_LLM_MODEL
+
+
+async def timed_run(agent: Agent, timing: dict, **kwargs) -> AgentRunResult:
+    """
+    `agent.run`, keeping the wall time of the model call in `timing["latency"]`,
+    so quota waits and retry backoff stay out of the recorded latencies.
+    """
+    started = time.perf_counter()
+    try:
+        return await agent.run(**kwargs)
+    finally:
+        timing["latency"] = time.perf_counter() - started
 
 
 def ask_something(
-    prompt: str, message_history: list[ModelMessage] = None
-) -> AgentRunResult[str]:
-    """Ask Gemini a question with the provided prompt."""
-    agent = Agent(model=MODEL, instructions=INSTRUCTION_PROMPT)
-    result = agent.run_sync(user_prompt=prompt, message_history=message_history)
+    prompt: str,
+    message_history: list[ModelMessage] = None,
+    instructions: str = INSTRUCTION_PROMPT,
+    cache: bool = False,
+    output_type: type = str,
+    output_retries: int = LLM_OUTPUT_RETRIES,
+    model_name: str = DEFAULT_LLM_MODEL,
+    call_site: str = "default",
+    paced: bool = False,
+) -> Union[AgentRunResult, CachedRunResult]:
+    """
+    Ask Gemini a question with the provided prompt, retrying transient errors.
+    A structured `output_type` is validated, and re-asked up to `output_retries` times.
+    With `cache=True`, an identical earlier call is answered from the response cache.
+    With `paced=True`, for bulk analysis, the request waits for the quota first.
+    Latency and tokens are recorded under `call_site`.
+    """
+    agent = get_agent(model_name, instructions, output_type, output_retries)
+    started = time.perf_counter()
+
+    key = None
+    adapter = None if output_type is str else TypeAdapter(output_type)
+    if cache and LLM_CACHE_ENABLED:
+        key = cache_key(
+            model_name,
+            instructions,
+            prompt,
+            message_history,
+            adapter.json_schema() if adapter else None,
+        )
+        if (output := get_response_cache().get(key)) is not None:
+            logger.debug(
+                f"💾 LLM cache hit {key[:12]} ({get_response_cache().stats()})"
+            )
+            get_llm_metrics().record(
+                call_site, model_name, time.perf_counter() - started, cached=True
+            )
+            return CachedRunResult(
+                output=adapter.validate_json(output) if adapter else output
+            )
+
+    timing = {}
+    try:
+        result = llm_executor.call(
+            timed_run,
+            agent,
+            timing,
+            user_prompt=prompt,
+            message_history=message_history,
+            paced=paced,
+        )
+    except Exception:
+        get_llm_metrics().record(
+            call_site, model_name, timing.get("latency", 0.0), ok=False
+        )
+        raise
+    get_llm_metrics().record(
+        call_site, model_name, timing["latency"], usage=result.usage()
+    )
+
+    if key:
+        output = adapter.dump_json(result.output).decode() if adapter else result.output
+        get_response_cache().put(key, model_name, output)
+    return result
+
+
+async def ask(
+    prompt: str,
+    message_history: list[ModelMessage] = None,
+    instructions: str = INSTRUCTION_PROMPT,
+    output_type: type = str,
+    output_retries: int = LLM_OUTPUT_RETRIES,
+    model_name: str = DEFAULT_LLM_MODEL,
+    call_site: str = "default",
+    paced: bool = False,
+) -> AgentRunResult:
+    """Async `ask_something`, for coroutines running on the LLM loop."""
+    agent = get_agent(model_name, instructions, output_type, output_retries)
+    timing = {}
+    try:
+        result = await llm_executor.acall(
+            timed_run,
+            agent,
+            timing,
+            user_prompt=prompt,
+            message_history=message_history,
+            paced=paced,
+        )
+    except Exception:
+        get_llm_metrics().record(
+            call_site, model_name, timing.get("latency", 0.0), ok=False
+        )
+        raise
+    get_llm_metrics().record(
+        call_site, model_name, timing["latency"], usage=result.usage()
+    )
     return result
 
 
-def parse_json_block(text: str) -> Optional[dict]:
-    """Remove markdown ```json ... ``` if present and parse JSON."""
+def hedge_delay(model_name: str) -> float:
+    """Seconds to wait for an answer before hedging: the model's observed p95."""
+    p95 = get_llm_metrics().latency_percentile(model_name, 95)
+    return LLM_HEDGE_DEFAULT_DELAY if p95 is None else p95
+
+
+async def ask_hedged(
+    prompt: str,
+    message_history: list[ModelMessage] = None,
+    instructions: str = INSTRUCTION_PROMPT,
+    model_name: str = DEFAULT_LLM_MODEL,
+    call_site: str = "default",
+    delay: Optional[float] = None,
+) -> AgentRunResult:
+    """
+    Async `ask`, sending an identical second request when the first one has
+    not answered after `delay` (the p95 latency by default). The first
+    successful answer wins and the other request is cancelled.
+    Neither request waits for the quota, so the delay counts from when the
+    first one is sent, never from a wait for a token.
+    """
+    ask_kwargs = dict(
+        message_history=message_history,
+        instructions=instructions,
+        model_name=model_name,
+        paced=False,
+    )
+    first = asyncio.create_task(ask(prompt, call_site=call_site, **ask_kwargs))
+    delay = hedge_delay(model_name) if delay is None else delay
+    done, _ = await asyncio.wait({first}, timeout=delay)
+    if done:
+        return first.result()
+
+    logger.info(f"🏁 No answer from {model_name} after {delay:.1f}s, hedging.")
+    second = asyncio.create_task(
+        ask(prompt, call_site=f"{call_site}_hedge", **ask_kwargs)
+    )
+    pending = {first, second}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        logger.info("🏁 Hedged request answered first.")
+                    return task.result()
+        return first.result()  # Both failed, raise the first error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def ask_something_hedged(
+    prompt: str,
+    message_history: list[ModelMessage] = None,
+    instructions: str = INSTRUCTION_PROMPT,
+    model_name: str = DEFAULT_LLM_MODEL,
+    call_site: str = "default",
+) -> AgentRunResult:
+    """Blocking `ask_hedged` on the LLM loop, or a plain ask with hedging off."""
+    if not LLM_HEDGE_ENABLED:
+        return ask_something(
+            prompt,
+            message_history=message_history,
+            instructions=instructions,
+            model_name=model_name,
+            call_site=call_site,
+        )
+    return get_llm_loop().run(
+        ask_hedged(
+            prompt,
+            message_history=message_history,
+            instructions=instructions,
+            model_name=model_name,
+            call_site=call_site,
+        )
+    )
+
+
+def stream_something(
+    prompt: str,
+    on_text: Callable[[str], None],
+    message_history: list[ModelMessage] = None,
+    instructions: str = INSTRUCTION_PROMPT,
+    call_site: str = "default",
+    model_name: str = DEFAULT_LLM_MODEL,
+) -> tuple[str, list[ModelMessage]]:
+    """
+    Ask Gemini a question and stream the answer, calling `on_text` with the
+    text received so far. Returns the full answer and the new messages.
+    The stream runs on the LLM loop; `on_text` runs in the calling thread, so a
+    slow callback delays the updates, not the other model requests.
+    """
+    updates: queue.Queue = queue.Queue()
+    done = object()
+
+    async def run() -> tuple[str, list[ModelMessage], Usage]:
+        agent = get_agent(model_name, instructions)
+        output = ""
+        try:
+            async with agent.run_stream(
+                user_prompt=prompt, message_history=message_history
+            ) as result:
+                async for output in result.stream_text(debounce_by=None):
+                    updates.put(output)
+        finally:
+            updates.put(done)
+        return output, result.new_messages(), result.usage()
+
+    started = time.perf_counter()
+    future = get_llm_loop().submit(run())
     try:
-        cleaned = re.sub(r"^```json|^```|```$", "", text.strip(), flags=re.MULTILINE)
-        return json.loads(cleaned)
-    except json.JSONDecodeError as e:
-        logger.error(f"❌ JSON decode failed: {e}")
-        return None
+        while (text := updates.get()) is not done:
+            on_text(text)
+        output, new_messages, usage = future.result()
+    except Exception:
+        future.cancel()
+        get_llm_metrics().record(
+            call_site, model_name, time.perf_counter() - started, ok=False
+        )
+        raise
+    get_llm_metrics().record(
+        call_site, model_name, time.perf_counter() - started, usage=usage
+    )
+    return output, new_messages
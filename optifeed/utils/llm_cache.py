@@ -0,0 +1,156 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Optional
+
+from pydantic_ai.messages import ModelMessage, ModelMessagesTypeAdapter
+
+from optifeed.utils.config import (
+    LLM_CACHE_DB_FILE,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_TTL_SECONDS,
+)
+from optifeed.utils.logger import logger
+
+PRUNE_EVERY = 100  # Writes between two size-based evictions
+
+
+@dataclass
+class CachedRunResult:
+    """Cached answer, shaped like an `AgentRunResult` for callers reading `.output`."""
+
+    output: Any
+
+
+def cache_key(
+    model_name: str,
+    instructions: str,
+    prompt: str,
+    message_history: Optional[list[ModelMessage]] = None,
+    output_schema: Optional[dict] = None,
+) -> str:
+    """Hash everything that determines the answer of a call."""
+    history = (
+        ModelMessagesTypeAdapter.dump_json(message_history).decode()
+        if message_history
+        else None
+    )
+    key_parts = [model_name, instructions, prompt, history]
+    if output_schema is not None:  # Structured calls, text answers keep their keys
+        key_parts.append(output_schema)
+    payload = json.dumps(key_parts, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent LLM answer cache keyed by `cache_key`.
+    Entries expire after `ttl` seconds and the least recently used ones are
+    evicted beyond `max_entries`.
+    """
+
+    def __init__(
+        self,
+        db_file: str = LLM_CACHE_DB_FILE,
+        ttl: float = LLM_CACHE_TTL_SECONDS,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(db_file, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                output TEXT,
+                created_at REAL,
+                accessed_at REAL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed_at "
+            "ON llm_cache(accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached answer (text or JSON), or None if unknown or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT output FROM llm_cache WHERE key = ? AND created_at >= ?",
+                (key, now - self.ttl),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, model_name: str, output: str):
+        """Store an answer, evicting old entries now and then."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_cache
+                (key, model, output, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, model_name, output, now, now),
+            )
+            self._writes += 1
+            if self._writes % PRUNE_EVERY == 0:
+                self._prune(now)
+            self._conn.commit()
+
+    def _prune(self, now: float):
+        """Drop expired entries, then the least recently used ones over the cap."""
+        expired = self._conn.execute(
+            "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,)
+        ).rowcount
+        overflow = self._conn.execute(
+            """
+            DELETE FROM llm_cache WHERE key IN (
+                SELECT key FROM llm_cache ORDER BY accessed_at DESC
+                LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,),
+        ).rowcount
+        if expired or overflow:
+            logger.debug(
+                f"🧹 LLM cache evicted {expired} expired and {overflow} old answers."
+            )
+
+    def stats(self) -> dict:
+        """Hit/miss counters of this process."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_response_cache() -> ResponseCache:
+    """The shared answer cache, opened on first use."""
+    return ResponseCache()
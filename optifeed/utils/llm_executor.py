@@ -0,0 +1,108 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Awaitable, Callable, Iterable, Iterator, TypeVar
+
+from pydantic_ai.exceptions import ModelHTTPError
+
+from optifeed.utils.config import (
+    LLM_CONCURRENCY,
+    LLM_MAX_RETRIES,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_RETRY_BASE_DELAY,
+    LLM_RETRY_MAX_DELAY,
+)
+from optifeed.utils.llm_loop import get_llm_loop
+from optifeed.utils.logger import logger
+from optifeed.utils.rate_limit import TokenBucket
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits and server errors are worth retrying, other failures are not."""
+    return isinstance(error, ModelHTTPError) and (
+        error.status_code == 429 or error.status_code >= 500
+    )
+
+
+class LLMExecutor:
+    """
+    Runs LLM work within the model quota.
+    `call` runs single requests on the LLM loop and retries rate limits and
+    server errors with jittered exponential backoff; paced requests are also
+    spread to `rpm` per minute. `map` runs jobs on at most `concurrency`
+    threads and yields their results as they complete.
+    The bucket is per process: only the pipeline's bulk analysis is paced,
+    interactive asks go out at once and rely on the retries.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = LLM_CONCURRENCY,
+        rpm: float = LLM_REQUESTS_PER_MINUTE,
+        max_retries: int = LLM_MAX_RETRIES,
+        base_delay: float = LLM_RETRY_BASE_DELAY,
+        max_delay: float = LLM_RETRY_MAX_DELAY,
+    ):
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._bucket = TokenBucket(rpm / 60)
+
+    def call(
+        self, fn: Callable[..., Awaitable[R]], *args, paced: bool = True, **kwargs
+    ) -> R:
+        """
+        Make one model request with a coroutine function, from any thread but
+        the LLM loop's, retrying transient errors. With `paced`, every attempt
+        first waits for a token of the quota.
+        """
+        for attempt in range(self.max_retries + 1):
+            if paced:
+                self._bucket.acquire()
+            try:
+                return get_llm_loop().run(fn(*args, **kwargs))
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                time.sleep(self._backoff(attempt, e))
+
+    async def acall(
+        self, fn: Callable[..., Awaitable[R]], *args, paced: bool = True, **kwargs
+    ) -> R:
+        """`call` for coroutines already running on the LLM loop."""
+        for attempt in range(self.max_retries + 1):
+            if paced:
+                await self._bucket.acquire_async()
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                await asyncio.sleep(self._backoff(attempt, e))
+
+    def _backoff(self, attempt: int, error: ModelHTTPError) -> float:
+        """Seconds to wait before the next attempt."""
+        # Full jitter keeps parallel callers from retrying in lockstep
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        logger.warning(
+            f"⚠️ LLM request failed ({error.status_code}), "
+            f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s"
+        )
+        return delay
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T]) -> Iterator[tuple[T, R]]:
+        """Run `fn` on every item concurrently, yielding (item, result) as each completes."""
+        with ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="llm"
+        ) as executor:
+            futures = {executor.submit(fn, item): item for item in items}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+
+llm_executor = LLMExecutor()
@@ -0,0 +1,40 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Coroutine, TypeVar
+
+R = TypeVar("R")
+
+
+class LLMLoop:
+    """
+    A long-lived event loop on a daemon thread, where every model request runs.
+    The Gemini client's connection pool is bound to the loop that opened its
+    connections, so requests from any thread are submitted here rather than
+    run in a fresh `asyncio.run`, which would break it for the next caller.
+    """
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="llm-loop", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, coro: Coroutine[None, None, R]) -> Future:
+        """Schedule a coroutine on the loop."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro: Coroutine[None, None, R]) -> R:
+        """Run a coroutine on the loop and wait for its result."""
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("Already on the LLM loop, await the coroutine instead.")
+        return self.submit(coro).result()
+
+
+@lru_cache(maxsize=1)
+def get_llm_loop() -> LLMLoop:
+    """The process's LLM loop, started on first use."""
+    return LLMLoop()
@@ -0,0 +1,166 @@
+import argparse
+import sqlite3
+import statistics
+import threading
+import time
+from collections import defaultdict, deque
+from functools import lru_cache
+from typing import Optional
+
+from optifeed.utils.config import (
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_METRICS_DB_FILE,
+    LLM_PRICES,
+)
+from optifeed.utils.logger import logger
+
+RECENT_LATENCIES = 200  # Latencies per model kept in memory for percentiles
+
+
+class LLMMetrics:
+    """
+    Append-only SQLite log of LLM calls: latency, tokens, model and call site.
+    The latest latencies of each model are also kept in memory for `latency_percentile`.
+    """
+
+    def __init__(self, db_file: str = LLM_METRICS_DB_FILE):
+        self._lock = threading.Lock()
+        self._recent: dict[str, deque[float]] = defaultdict(
+            lambda: deque(maxlen=RECENT_LATENCIES)
+        )
+        self._conn = sqlite3.connect(db_file, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_calls (
+                ts REAL,
+                day TEXT,
+                call_site TEXT,
+                model TEXT,
+                latency_ms REAL,
+                input_tokens INTEGER,
+                output_tokens INTEGER,
+                cached INTEGER,
+                ok INTEGER
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_calls_ts ON llm_calls(ts)"
+        )
+        self._conn.commit()
+
+    def record(
+        self,
+        call_site: str,
+        model: str,
+        latency: float,
+        usage=None,
+        cached: bool = False,
+        ok: bool = True,
+    ):
+        """Log one call; `usage` is the pydantic-ai run usage, if the model answered."""
+        now = time.time()
+        try:
+            with self._lock:
+                if ok and not cached:
+                    self._recent[model].append(latency)
+                self._conn.execute(
+                    "INSERT INTO llm_calls VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        now,
+                        time.strftime("%Y-%m-%d", time.localtime(now)),
+                        call_site,
+                        model,
+                        latency * 1000,
+                        getattr(usage, "request_tokens", None) or 0,
+                        getattr(usage, "response_tokens", None) or 0,
+                        int(cached),
+                        int(ok),
+                    ),
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            # Accounting must never fail the call it measures
+            logger.warning(f"⚠️ Failed to record LLM call metrics: {e}")
+
+    def latency_percentile(
+        self, model: str, pct: int, min_samples: int = LLM_HEDGE_MIN_SAMPLES
+    ) -> Optional[float]:
+        """Percentile of the recent answered calls of a model, in seconds, if known."""
+        with self._lock:
+            latencies = list(self._recent[model])
+        if len(latencies) < min_samples:
+            return None
+        return percentile(latencies, pct)
+
+    def rows(self, days: int) -> list[tuple]:
+        """Calls of the last `days` days."""
+        with self._lock:
+            return self._conn.execute(
+                """
+                SELECT day, call_site, model, latency_ms, input_tokens,
+                       output_tokens, cached, ok
+                FROM llm_calls WHERE ts >= ? ORDER BY day, call_site
+                """,
+                (time.time() - days * 24 * 3600,),
+            ).fetchall()
+
+
+@lru_cache(maxsize=1)
+def get_llm_metrics() -> LLMMetrics:
+    """The shared call log, opened on first use."""
+    return LLMMetrics()
+
+
+def percentile(values: list[float], pct: int) -> float:
+    """Inclusive percentile of a non-empty list."""
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> Optional[float]:
+    """Cost in USD from the per million token prices in LLM_PRICES."""
+    if model not in LLM_PRICES:
+        return None
+    input_price, output_price = LLM_PRICES[model]
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+def report(days: int = 7):
+    """Print latency and token percentiles per day, call site and model."""
+    groups = defaultdict(list)
+    for day, call_site, model, *values in get_llm_metrics().rows(days):
+        groups[(day, call_site, model)].append(values)
+
+    if not groups:
+        print(f"No LLM calls recorded in the last {days} days.")
+        return
+
+    print(
+        f"{'day':10}  {'call site':16}  {'model':36}  {'calls':>5}  {'cached':>6}  {'errors':>6}  "
+        f"{'p50 ms':>7}  {'p95 ms':>7}  {'p50 in':>6}  {'p95 in':>6}  "
+        f"{'p50 out':>7}  {'p95 out':>7}  {'cost $':>8}"
+    )
+    for (day, call_site, model), calls in groups.items():
+        # Percentiles describe calls that reached the model
+        answered = [c for c in calls if not c[3] and c[4]] or calls
+        latencies = [c[0] for c in answered]
+        inputs = [c[1] for c in answered]
+        outputs = [c[2] for c in answered]
+        cost = estimate_cost(model, sum(inputs), sum(outputs))
+        print(
+            f"{day:10}  {call_site:16}  {model:36}  {len(calls):5}  "
+            f"{sum(c[3] for c in calls):6}  {sum(1 - c[4] for c in calls):6}  "
+            f"{percentile(latencies, 50):7.0f}  {percentile(latencies, 95):7.0f}  "
+            f"{percentile(inputs, 50):6.0f}  {percentile(inputs, 95):6.0f}  "
+            f"{percentile(outputs, 50):7.0f}  {percentile(outputs, 95):7.0f}  "
+            f"{'n/a' if cost is None else f'{cost:.4f}':>8}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report LLM call latency and tokens.")
+    parser.add_argument("--days", type=int, default=7, help="Days to cover")
+    report(parser.parse_args().days)
@@ -1,29 +1,246 @@
+import asyncio
 import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
 
 import pika
 
-from optifeed.utils.config import RABBIT_HOST, RABBIT_PASS, RABBIT_USER
+from optifeed.utils.config import (
+    RABBIT_HEARTBEAT,
+    RABBIT_HOST,
+    RABBIT_PASS,
+    RABBIT_PUBLISH_BATCH_SIZE,
+    RABBIT_PUBLISHER_POOL_SIZE,
+    RABBIT_USER,
+)
 from optifeed.utils.logger import logger
 
+# Task routing: each task type gets its own lane so cheap alerts never wait
+# behind expensive LLM questions
+ALERT_QUEUE = "alerts"
+ASK_QUEUE = "asks"
+TASK_ROUTES = {
+    "alert": ALERT_QUEUE,
+    "ask": ASK_QUEUE,
+}
+DEFAULT_QUEUE = ASK_QUEUE
+LANE_QUEUES = (ALERT_QUEUE, ASK_QUEUE)
+# Single queue of releases before the lanes: the worker moves what is left
+# in it to the lanes. Remove once deployed everywhere for a release.
+LEGACY_QUEUE = "tasks"
+
+
+def queue_for_task(task: dict) -> str:
+    """Return the queue (lane) a task should be published to."""
+    return TASK_ROUTES.get(task.get("type"), DEFAULT_QUEUE)
+
+
+def connection_parameters() -> pika.ConnectionParameters:
+    """Build the RabbitMQ connection parameters from the configuration."""
+    return pika.ConnectionParameters(
+        host=RABBIT_HOST,
+        credentials=pika.PlainCredentials(RABBIT_USER, RABBIT_PASS),
+        heartbeat=RABBIT_HEARTBEAT,
+    )
+
+
+class RabbitPublisher:
+    """
+    Long-lived RabbitMQ publisher reusing a single connection and channel.
+    Messages are sent in transactional batches so the broker acknowledges a
+    whole batch at once, and the connection is reopened when it is lost.
+    Not thread-safe: pika's blocking adapter must stay on one thread.
+    """
+
+    def __init__(self, batch_size: int = RABBIT_PUBLISH_BATCH_SIZE):
+        self.batch_size = max(1, batch_size)
+        self._connection: Optional[pika.BlockingConnection] = None
+        self._channel = None
+
+    def connect(self):
+        """Open the connection and channel if they are not already open."""
+        if self._channel is not None and self._channel.is_open:
+            return self._channel
+
+        self.close()
+        self._connection = pika.BlockingConnection(connection_parameters())
+        self._channel = self._connection.channel()
+        for queue in LANE_QUEUES:
+            self._channel.queue_declare(queue=queue)
+        self._channel.tx_select()
+        logger.debug("🔌 Publisher connected to RabbitMQ.")
+        return self._channel
+
+    def publish(self, task: dict):
+        """Publish a single task, raising if the broker did not accept it."""
+        if self._publish_batch([task]):
+            raise pika.exceptions.AMQPError(f"Broker did not accept task: {task}")
+
+    def publish_many(self, tasks: Iterable[dict]) -> list[dict]:
+        """
+        Publish tasks over the same channel, committing them in batches.
+        Returns the tasks that could not be published so callers can retry them.
+        """
+        failed = []
+        batch = []
+        for task in tasks:
+            batch.append(task)
+            if len(batch) >= self.batch_size:
+                failed.extend(self._publish_batch(batch))
+                batch = []
+        if batch:
+            failed.extend(self._publish_batch(batch))
+        return failed
+
+    def _publish_batch(self, batch: list[dict]) -> list[dict]:
+        """
+        Pipeline a batch of messages then commit it in one round trip.
+        An uncommitted batch is discarded by the broker when the channel dies,
+        so the whole batch can safely be resent once after reconnecting.
+        """
+        try:
+            messages = [
+                (queue_for_task(task), json.dumps(task, ensure_ascii=False))
+                for task in batch
+            ]
+        except (TypeError, ValueError) as e:
+            logger.error(f"❌ Task batch is not JSON serializable: {e}")
+            return list(batch)
+
+        for attempt in (1, 2):
+            try:
+                channel = self.connect()
+                for queue, body in messages:
+                    channel.basic_publish(
+                        exchange="",
+                        routing_key=queue,
+                        body=body,
+                        properties=pika.BasicProperties(delivery_mode=2),  # persistent
+                    )
+                channel.tx_commit()
+                logger.debug(f"📤 Published {len(batch)} task(s) to RabbitMQ.")
+                return []
+            except pika.exceptions.AMQPError as e:
+                self.close()
+                if attempt == 2:
+                    logger.error(
+                        f"❌ Failed to publish {len(batch)} task(s) to RabbitMQ: {e!r}"
+                    )
+                    return list(batch)
+                logger.warning(f"⚠️ RabbitMQ connection lost ({e!r}), reconnecting...")
+
+    def process_data_events(self):
+        """Service heartbeats on an idle connection so the broker keeps it open."""
+        if self._connection is None or not self._connection.is_open:
+            return
+        try:
+            self._connection.process_data_events(time_limit=0)
+        except pika.exceptions.AMQPError as e:
+            logger.warning(f"⚠️ Idle RabbitMQ connection dropped: {e!r}")
+            self.close()
+
+    def close(self):
+        """Close the channel and connection, ignoring errors on dead sockets."""
+        connection, self._connection, self._channel = self._connection, None, None
+        if connection is not None and connection.is_open:
+            try:
+                connection.close()
+            except pika.exceptions.AMQPError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class AsyncRabbitPublisher:
+    """
+    Asyncio front-end over a small pool of long-lived publishers.
+    Each pooled publisher owns its connection and runs on its own thread,
+    so publishing never blocks the event loop.
+    """
+
+    def __init__(self, pool_size: int = RABBIT_PUBLISHER_POOL_SIZE):
+        self.pool_size = max(1, pool_size)
+        self._slots: Optional[asyncio.Queue] = None
+        self._executors: list[ThreadPoolExecutor] = []
+        self._keepalive_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Open the publisher pool and start servicing heartbeats."""
+        loop = asyncio.get_running_loop()
+        self._slots = asyncio.Queue()
+        for idx in range(self.pool_size):
+            executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=f"rabbit-publisher-{idx}"
+            )
+            publisher = RabbitPublisher()
+            try:
+                await loop.run_in_executor(executor, publisher.connect)
+            except pika.exceptions.AMQPError as e:
+                logger.warning(
+                    f"⚠️ Publisher {idx} could not connect yet ({e!r}), will retry on publish."
+                )
+            self._executors.append(executor)
+            self._slots.put_nowait((publisher, executor))
+
+        self._keepalive_task = asyncio.create_task(self._keepalive())
+        logger.info(f"🐇 Async publisher started with {self.pool_size} channel(s).")
+
+    async def publish(self, task: dict):
+        """Publish a task on the first free pooled channel."""
+        loop = asyncio.get_running_loop()
+        publisher, executor = await self._slots.get()
+        try:
+            await loop.run_in_executor(executor, publisher.publish, task)
+        finally:
+            self._slots.put_nowait((publisher, executor))
+
+    async def _keepalive(self):
+        """Periodically service heartbeats on every pooled connection."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(RABBIT_HEARTBEAT / 2)
+            for _ in range(self.pool_size):
+                publisher, executor = await self._slots.get()
+                try:
+                    await loop.run_in_executor(executor, publisher.process_data_events)
+                finally:
+                    self._slots.put_nowait((publisher, executor))
+
+    async def close(self):
+        """Stop servicing heartbeats and close every pooled connection."""
+        if self._keepalive_task is not None:
+            self._keepalive_task.cancel()
+            self._keepalive_task = None
+
+        loop = asyncio.get_running_loop()
+        for _ in range(len(self._executors)):
+            publisher, executor = await self._slots.get()
+            await loop.run_in_executor(executor, publisher.close)
+            executor.shutdown(wait=True)
+        self._executors = []
+        logger.info("🐇 Async publisher closed.")
+
 
 def publish_task(task: dict):
     """Publish a task to RabbitMQ."""
     try:
-        with pika.BlockingConnection(
-            pika.ConnectionParameters(
-                host=RABBIT_HOST,
-                credentials=pika.PlainCredentials(RABBIT_USER, RABBIT_PASS),
-            )
-        ) as connection:
-            channel = connection.channel()
-            channel.queue_declare(queue="tasks")
-            channel.basic_publish(
-                exchange="",
-                routing_key="tasks",
-                body=json.dumps(task, ensure_ascii=False),
-                properties=pika.BasicProperties(delivery_mode=2),  # persistent
-            )
-            logger.debug(f"📤 Published task to RabbitMQ: {task}")
-
+        with RabbitPublisher() as publisher:
+            publisher.publish(task)
     except Exception as e:
         logger.error(f"❌ Failed to publish task to RabbitMQ: {e}", exc_info=True)
+
+
+def publish_tasks(tasks: Iterable[dict]) -> list[dict]:
+    """
+    Publish many tasks to RabbitMQ over a single connection.
+    Returns the tasks that failed to publish.
+    """
+    with RabbitPublisher() as publisher:
+        failed = publisher.publish_many(tasks)
+    if failed:
+        logger.warning(f"⚠️ {len(failed)} task(s) failed to publish.")
+    return failed
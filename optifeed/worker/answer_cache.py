@@ -0,0 +1,145 @@
+import math
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+from optifeed.utils.config import (
+    ANSWER_CACHE_DIMENSIONS,
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_THRESHOLD,
+    ANSWER_CACHE_TTL_SECONDS,
+)
+from optifeed.utils.logger import logger
+
+# Words that carry no topic, in the languages the bot is asked in
+STOP_WORDS = frozenset(
+    """
+    a about an and any are at be can could do does for from give how i in is it
+    its me my of on or please s tell the there this to today us what whats when
+    where which who why with would you your
+    au aux avec c ce ces d de des du en est et il je l la le les mais me moi
+    mon ou par pour qu que quel quelle quels quelles qui sur t te toi tu un une
+    vous y aujourd hui
+    question
+    """.split()
+)
+MIN_TERMS = 2  # Shorter questions are usually follow-ups that need the history
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, strip accents, mentions, punctuation and extra whitespace."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"@\w+", " ", text)
+    return " ".join(re.findall(r"\w+", text))
+
+
+def vectorize(
+    question: str, dimensions: int = ANSWER_CACHE_DIMENSIONS
+) -> dict[int, float]:
+    """
+    Embed a normalized question with the hashing trick over its content words
+    and word bigrams, as an L2-normalized sparse vector.
+    """
+    terms = [word for word in question.split() if word not in STOP_WORDS]
+    if len(terms) < MIN_TERMS:
+        return {}
+
+    features = terms + [f"{a} {b}" for a, b in zip(terms, terms[1:])]
+    vector: dict[int, float] = {}
+    for feature in features:
+        index = zlib.crc32(feature.encode()) % dimensions
+        vector[index] = vector.get(index, 0.0) + 1.0
+
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    return {index: weight / norm for index, weight in vector.items()}
+
+
+def cosine(a: dict[int, float], b: dict[int, float]) -> float:
+    """Cosine similarity of two normalized sparse vectors."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(index, 0.0) for index, weight in a.items())
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    vector: dict[int, float]
+    answer: str
+    latency: float  # Seconds the original answer took
+    created_at: float
+
+
+class AnswerCache:
+    """
+    Recent answers of the ask path, served again for similar questions.
+    Questions are matched by cosine similarity of their hashed word vectors,
+    within `ttl` seconds of the original answer.
+    """
+
+    def __init__(
+        self,
+        ttl: float = ANSWER_CACHE_TTL_SECONDS,
+        threshold: float = ANSWER_CACHE_THRESHOLD,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl = ttl
+        self.threshold = threshold
+        self.lookups = 0
+        self.hits = 0
+        self.saved_seconds = 0.0
+        self._entries: deque[CachedAnswer] = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+
+    def lookup(self, question: str) -> Optional[str]:
+        """Return the answer of a similar recent question, if any."""
+        vector = vectorize(normalize_question(question))
+        if not vector:
+            return None
+
+        started = time.perf_counter()
+        with self._lock:
+            self._evict_expired()
+            best, best_score = None, self.threshold
+            for entry in self._entries:
+                score = cosine(vector, entry.vector)
+                if score >= best_score:
+                    best, best_score = entry, score
+
+            self.lookups += 1
+            if best is None:
+                return None
+            self.hits += 1
+            saved = best.latency - (time.perf_counter() - started)
+            self.saved_seconds += saved
+
+        logger.info(
+            f"♻️ Answer cache hit (similarity {best_score:.2f} with "
+            f"'{best.question[:60]}'), saved ~{saved:.1f}s. "
+            f"Hit rate {self.hits}/{self.lookups}, "
+            f"~{self.saved_seconds:.0f}s saved in total."
+        )
+        return best.answer
+
+    def store(self, question: str, answer: str, latency: float):
+        """Remember the answer to a question for the next `ttl` seconds."""
+        normalized = normalize_question(question)
+        vector = vectorize(normalized)
+        if not vector or not answer:
+            return
+        with self._lock:
+            self._entries.append(
+                CachedAnswer(normalized, vector, answer, latency, time.time())
+            )
+
+    def _evict_expired(self):
+        """Drop answers older than the TTL, oldest first."""
+        cutoff = time.time() - self.ttl
+        while self._entries and self._entries[0].created_at < cutoff:
+            self._entries.popleft()
@@ -0,0 +1,78 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Hashable, Optional
+
+from optifeed.utils.logger import logger
+
+
+class KeyedDispatcher:
+    """
+    Run jobs on a bounded thread pool while keeping jobs that share a key in order.
+    Jobs with distinct keys (or no key) run in parallel; jobs with the same key
+    run one after another in submission order, at most `max_queued_per_key`
+    of them waiting at a time.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        name: str = "worker",
+        max_queued_per_key: Optional[int] = None,
+    ):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+        self.max_queued_per_key = max_queued_per_key
+        self._lock = threading.Lock()
+        # Key -> jobs waiting for the running job with the same key to finish
+        self._pending: dict[Hashable, deque[Callable[[], None]]] = {}
+
+    def submit(self, key: Optional[Hashable], job: Callable[[], None]) -> bool:
+        """
+        Schedule a job, queuing it behind any running job with the same key.
+        Returns False, without scheduling it, if the key's queue is full.
+        """
+        if key is None:
+            self._executor.submit(self._run, None, job)
+            return True
+
+        with self._lock:
+            queue = self._pending.get(key)
+            if queue is not None:
+                if (
+                    self.max_queued_per_key is not None
+                    and len(queue) >= self.max_queued_per_key
+                ):
+                    return False
+                queue.append(job)
+                return True
+            self._pending[key] = deque()
+        self._executor.submit(self._run, key, job)
+        return True
+
+    def _run(self, key: Optional[Hashable], job: Callable[[], None]):
+        """Run a job, then hand the next job with the same key to the pool."""
+        try:
+            job()
+        except Exception as e:
+            logger.error(f"❌ Unexpected error in dispatched job: {e}", exc_info=True)
+
+        if key is None:
+            return
+
+        with self._lock:
+            queue = self._pending[key]
+            if not queue:
+                del self._pending[key]
+                return
+            next_job = queue.popleft()
+        try:
+            self._executor.submit(self._run, key, next_job)
+        except RuntimeError:
+            # Pool shut down: unacked tasks will be redelivered by RabbitMQ
+            logger.warning(f"⚠️ Dispatcher stopped, dropping queued job for {key}.")
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting jobs and optionally wait for running ones."""
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,50 @@
+import hashlib
+
+from optifeed.db.sqlite_utils import (
+    get_active_subscribers,
+    remove_subscriber,
+    save_broadcast_progress,
+    start_broadcast,
+)
+from optifeed.telegram.telegram import sender
+from optifeed.utils.config import FANOUT_BATCH_SIZE
+from optifeed.utils.logger import logger
+
+
+def broadcast_id_for(messages: list[str]) -> str:
+    """Derive a stable broadcast id from the alert content."""
+    return hashlib.sha256("\n".join(messages).encode()).hexdigest()
+
+
+def broadcast_alert(messages: list[str], broadcast_id: str = None):
+    """
+    Send an alert to every active subscriber, in batches of FANOUT_BATCH_SIZE.
+    Progress is checkpointed after each batch, so a redelivered task resumes
+    where the previous attempt stopped instead of starting over.
+    """
+    broadcast_id = broadcast_id or broadcast_id_for(messages)
+    cursor, done = start_broadcast(broadcast_id, messages)
+    if done:
+        logger.info(f"⏭️ Broadcast {broadcast_id[:12]} already delivered, skipping.")
+        return
+    if cursor:
+        logger.info(f"🔁 Resuming broadcast {broadcast_id[:12]} after chat {cursor}.")
+
+    delivered = 0
+    while chat_ids := get_active_subscribers(after=cursor, limit=FANOUT_BATCH_SIZE):
+        pairs = [(chat_id, message) for chat_id in chat_ids for message in messages]
+        responses = sender.send_many(pairs)
+
+        for (chat_id, _), response in zip(pairs, responses):
+            if response.get("ok"):
+                delivered += 1
+            elif response.get("error_code") == 403:  # Bot blocked or kicked
+                remove_subscriber(chat_id)
+
+        cursor = chat_ids[-1]
+        save_broadcast_progress(broadcast_id, cursor)
+
+    save_broadcast_progress(broadcast_id, cursor, done=True)
+    logger.info(
+        f"📣 Broadcast {broadcast_id[:12]} completed: {delivered} message(s) delivered."
+    )
@@ -0,0 +1,386 @@
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Callable, Iterable, Optional
+
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelMessagesTypeAdapter,
+    ModelRequest,
+    ModelResponse,
+    SystemPromptPart,
+)
+
+from optifeed.utils.config import (
+    HISTORY_BACKEND,
+    HISTORY_CACHE_SIZE,
+    HISTORY_DB_FILE,
+    HISTORY_TTL_SECONDS,
+)
+from optifeed.utils.logger import logger
+
+# Context management settings
+MAX_CONTEXT_LENGTH = 4000  # Maximum characters in context, older turns get summarized
+MIN_MESSAGES_TO_KEEP = 4  # Always keep at least this many recent messages
+MAX_MESSAGES = 50  # Hard limit on message count
+SAVE_ATTEMPTS = 5  # Read-modify-write rounds before giving up on a contended update
+
+
+def message_length(message: ModelMessage) -> int:
+    """Count the characters of every part of a message."""
+    total = 0
+    for part in message.parts:
+        content = getattr(part, "content", None)
+        if isinstance(content, str):
+            total += len(content)
+        elif content is not None:
+            total += len(str(content))
+        elif hasattr(part, "args_as_json_str"):  # Tool calls carry args instead
+            total += len(part.args_as_json_str())
+    return total
+
+
+class ConversationWindow:
+    """
+    Sliding window over a user's conversation with a running character count.
+    Appending and evicting the oldest message are O(1).
+    Evicted messages wait in `pending` until they are folded into `summary`.
+    `version` is the store version the window was read at, if any.
+    """
+
+    def __init__(
+        self,
+        messages: Iterable[ModelMessage] = (),
+        summary: str = "",
+        pending: Iterable[ModelMessage] = (),
+        max_chars: int = MAX_CONTEXT_LENGTH,
+        max_messages: int = MAX_MESSAGES,
+        min_messages: int = MIN_MESSAGES_TO_KEEP,
+    ):
+        self.max_chars = max_chars
+        self.max_messages = max_messages
+        self.min_messages = min_messages
+        self.summary = summary
+        self.pending: list[ModelMessage] = list(pending)
+        self.version: Optional[int] = None
+        self.char_count = 0
+        self._entries: deque[tuple[ModelMessage, int]] = deque()
+        self.extend(messages)
+
+    @property
+    def messages(self) -> list[ModelMessage]:
+        """Messages in the window, oldest first."""
+        return [message for message, _ in self._entries]
+
+    def prompt_messages(self) -> list[ModelMessage]:
+        """Messages to send as history, with the rolling summary up front."""
+        messages = self.messages
+        if not self.summary:
+            return messages
+
+        summary_part = SystemPromptPart(
+            content=f"Summary of the earlier conversation: {self.summary}"
+        )
+        if messages and isinstance(messages[0], ModelRequest):
+            first = messages[0]
+            messages[0] = ModelRequest(
+                parts=[summary_part, *first.parts], instructions=first.instructions
+            )
+            return messages
+        return [ModelRequest(parts=[summary_part]), *messages]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def append(self, message: ModelMessage) -> list[ModelMessage]:
+        """Append a message and return the messages evicted to stay in budget."""
+        return self.extend((message,))
+
+    def extend(self, messages: Iterable[ModelMessage]) -> list[ModelMessage]:
+        """Append messages and return the messages evicted to stay in budget."""
+        for message in messages:
+            length = message_length(message)
+            self._entries.append((message, length))
+            self.char_count += length
+        return self._trim()
+
+    def _trim(self) -> list[ModelMessage]:
+        """Evict the oldest messages until the window fits its budget."""
+        evicted = []
+        while len(self._entries) > self.max_messages or (
+            self.char_count > self.max_chars and len(self._entries) > self.min_messages
+        ):
+            evicted.append(self._popleft())
+
+        # A history must start with a request, never with an orphan response
+        while len(self._entries) > 1 and isinstance(self._entries[0][0], ModelResponse):
+            evicted.append(self._popleft())
+
+        if evicted:
+            self.pending.extend(evicted)
+            # Bound the backlog if summarization keeps failing
+            del self.pending[: -self.max_messages]
+            logger.debug(
+                f"🧹 Trimmed history: evicted {len(evicted)} messages, "
+                f"{len(self._entries)} left, {self.char_count} chars"
+            )
+        return evicted
+
+    def _popleft(self) -> ModelMessage:
+        message, length = self._entries.popleft()
+        self.char_count -= length
+        return message
+
+    def clear(self):
+        """Drop every message and the summary."""
+        self._entries.clear()
+        self.char_count = 0
+        self.summary = ""
+        self.pending = []
+
+
+def serialize_messages(messages: list[ModelMessage]) -> bytes:
+    """Serialize a message list to compressed JSON."""
+    return zlib.compress(ModelMessagesTypeAdapter.dump_json(messages))
+
+
+def deserialize_messages(blob: bytes) -> list[ModelMessage]:
+    """Deserialize a message list produced by `serialize_messages`."""
+    return ModelMessagesTypeAdapter.validate_json(zlib.decompress(blob))
+
+
+class HistoryStore(ABC):
+    """Base class for per-user conversation history backends."""
+
+    @abstractmethod
+    def get(self, user_id: int) -> ConversationWindow:
+        """Return the user's window, or an empty one if unknown or expired."""
+
+    @abstractmethod
+    def save(self, user_id: int, window: ConversationWindow) -> bool:
+        """
+        Persist the user's window, unless another writer saved a newer one
+        since it was read. Return whether it was saved.
+        """
+
+    def update(
+        self, user_id: int, change: Callable[[ConversationWindow], None]
+    ) -> ConversationWindow:
+        """
+        Apply `change` to the user's window and persist it. When another
+        writer saved in between, `change` is applied again to the newer window,
+        so neither update is lost.
+        """
+        for _ in range(SAVE_ATTEMPTS):
+            window = self.get(user_id)
+            change(window)
+            if self.save(user_id, window):
+                return window
+        logger.warning(f"⚠️ History of user {user_id} kept changing, update dropped.")
+        return window
+
+    @abstractmethod
+    def clear(self, user_id: int):
+        """Forget the user's history."""
+
+    @abstractmethod
+    def evict_idle(self) -> int:
+        """Drop histories idle for longer than the TTL; return how many were dropped."""
+
+
+class InMemoryHistoryStore(HistoryStore):
+    """Process-local history store, lost on restart. Fits a single worker."""
+
+    def __init__(self, ttl: float = HISTORY_TTL_SECONDS):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # Key: user_id, Value: (last update timestamp, window)
+        self._entries: dict[int, tuple[float, ConversationWindow]] = {}
+
+    def get(self, user_id: int) -> ConversationWindow:
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry is None or entry[0] < time.time() - self.ttl:
+            return ConversationWindow()
+        return entry[1]
+
+    def save(self, user_id: int, window: ConversationWindow) -> bool:
+        with self._lock:
+            self._entries[user_id] = (time.time(), window)
+        return True
+
+    def clear(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def evict_idle(self) -> int:
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            idle = [uid for uid, (ts, _) in self._entries.items() if ts < cutoff]
+            for uid in idle:
+                del self._entries[uid]
+        return len(idle)
+
+
+class SQLiteHistoryStore(HistoryStore):
+    """
+    SQLite-backed history store shared by every worker process on the host.
+    Decoded windows are kept in an LRU and revalidated with a version
+    stamp, so a cache hit costs one indexed lookup and no deserialization.
+    Saves compare and swap that version, so a worker never overwrites a
+    window another one saved after its read.
+    """
+
+    def __init__(
+        self,
+        db_file: str = HISTORY_DB_FILE,
+        ttl: float = HISTORY_TTL_SECONDS,
+        cache_size: int = HISTORY_CACHE_SIZE,
+    ):
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        # Key: user_id, Value: (version, window)
+        self._cache: OrderedDict[int, tuple[int, ConversationWindow]] = OrderedDict()
+
+        self._conn = sqlite3.connect(db_file, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS conversation_history (
+                user_id INTEGER PRIMARY KEY,
+                messages BLOB,
+                version INTEGER,
+                updated_at REAL,
+                summary TEXT,
+                pending BLOB
+            )
+            """
+        )
+        columns = {
+            row[1]
+            for row in self._conn.execute("PRAGMA table_info(conversation_history)")
+        }
+        for column, kind in (("summary", "TEXT"), ("pending", "BLOB")):
+            if column not in columns:
+                self._conn.execute(
+                    f"ALTER TABLE conversation_history ADD COLUMN {column} {kind}"
+                )
+        self._conn.commit()
+
+    def get(self, user_id: int) -> ConversationWindow:
+        with self._lock:
+            cached = self._cache.get(user_id)
+            cached_version = cached[0] if cached else None
+            # Only ship the payload back when our cached copy is stale
+            row = self._conn.execute(
+                """
+                SELECT version, updated_at, version IS :cached,
+                       CASE WHEN version IS :cached THEN NULL ELSE messages END,
+                       CASE WHEN version IS :cached THEN NULL ELSE summary END,
+                       CASE WHEN version IS :cached THEN NULL ELSE pending END
+                FROM conversation_history WHERE user_id = :user_id
+                """,
+                {"cached": cached_version, "user_id": user_id},
+            ).fetchone()
+
+            if row is None or row[1] < time.time() - self.ttl:
+                self._cache.pop(user_id, None)
+                window = ConversationWindow()
+                # An expired row is replaced by the next save
+                window.version = row[0] if row else None
+                return window
+
+            version, _, is_fresh, blob, summary, pending = row
+            if is_fresh:
+                self._cache.move_to_end(user_id)
+                return cached[1]
+
+            window = ConversationWindow(
+                deserialize_messages(blob),
+                summary=summary or "",
+                pending=deserialize_messages(pending) if pending else (),
+            )
+            window.version = version
+            self._remember(user_id, version, window)
+            return window
+
+    def save(self, user_id: int, window: ConversationWindow) -> bool:
+        expected = window.version
+        version = max(time.time_ns(), (expected or 0) + 1)
+        values = {
+            "user_id": user_id,
+            "messages": serialize_messages(window.messages),
+            "version": version,
+            "updated_at": time.time(),
+            "summary": window.summary,
+            "pending": serialize_messages(window.pending) if window.pending else None,
+            "expected": expected,
+        }
+        with self._lock:
+            if expected is None:
+                # A new history: only if no other worker created it meanwhile
+                cur = self._conn.execute(
+                    """
+                    INSERT OR IGNORE INTO conversation_history
+                    (user_id, messages, version, updated_at, summary, pending)
+                    VALUES (:user_id, :messages, :version, :updated_at, :summary, :pending)
+                    """,
+                    values,
+                )
+            else:
+                cur = self._conn.execute(
+                    """
+                    UPDATE conversation_history
+                    SET messages = :messages, version = :version,
+                        updated_at = :updated_at, summary = :summary,
+                        pending = :pending
+                    WHERE user_id = :user_id AND version = :expected
+                    """,
+                    values,
+                )
+            self._conn.commit()
+            if cur.rowcount != 1:
+                # The cached copy was changed in place by the caller: drop it
+                self._cache.pop(user_id, None)
+                logger.debug(f"History of user {user_id} changed since read, retrying.")
+                return False
+            window.version = version
+            self._remember(user_id, version, window)
+            return True
+
+    def clear(self, user_id: int):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM conversation_history WHERE user_id = ?", (user_id,)
+            )
+            self._conn.commit()
+            self._cache.pop(user_id, None)
+
+    def evict_idle(self) -> int:
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM conversation_history WHERE updated_at < ?",
+                (time.time() - self.ttl,),
+            )
+            self._conn.commit()
+            return cur.rowcount
+
+    def _remember(self, user_id: int, version: int, window: ConversationWindow):
+        """Insert into the LRU, evicting the least recently used entries."""
+        self._cache[user_id] = (version, window)
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+
+def create_history_store() -> HistoryStore:
+    """Build the history store selected by `HISTORY_BACKEND`."""
+    if HISTORY_BACKEND == "memory":
+        return InMemoryHistoryStore()
+    if HISTORY_BACKEND != "sqlite":
+        logger.warning(f"⚠️ Unknown history backend '{HISTORY_BACKEND}', using sqlite.")
+    return SQLiteHistoryStore()
@@ -0,0 +1,58 @@
+import time
+from typing import Optional
+
+from optifeed.telegram.telegram import edit_telegram_message, send_telegram_message
+from optifeed.utils.config import STREAM_EDIT_INTERVAL
+from optifeed.worker.tasks import MAX_MESSAGE_LENGTH, split_message
+
+
+class TelegramReplyStream:
+    """
+    Deliver a growing LLM reply to Telegram while it is being generated.
+    The first text is sent immediately, then the message is edited at most
+    every `edit_interval` seconds and continued in a new message past
+    Telegram's length limit.
+    """
+
+    def __init__(
+        self,
+        edit_interval: float = STREAM_EDIT_INTERVAL,
+        max_length: int = MAX_MESSAGE_LENGTH,
+    ):
+        self.edit_interval = edit_interval
+        self.max_length = max_length
+        self.first_sent_at: Optional[float] = None
+        self._message_ids: list[int] = []
+        self._displayed: list[str] = []  # Text currently shown in each message
+        self._last_flush = 0.0
+
+    def update(self, text: str):
+        """Show the reply received so far, throttled to the edit interval."""
+        if time.monotonic() - self._last_flush >= self.edit_interval:
+            self._flush(text)
+
+    def finish(self, text: str):
+        """Show the complete reply, bypassing the throttle."""
+        self._flush(text)
+
+    def _flush(self, text: str):
+        """Edit the messages that changed and send the chunks not shown yet."""
+        for idx, chunk in enumerate(split_message(text, self.max_length)):
+            if idx < len(self._message_ids):
+                if chunk != self._displayed[idx]:
+                    response = edit_telegram_message(self._message_ids[idx], chunk)
+                    if response.get("ok"):
+                        self._displayed[idx] = chunk
+                continue
+
+            response = send_telegram_message(chunk, parse_mode=None)
+            if not response.get("ok"):
+                break  # Retried on the next flush
+            if self.first_sent_at is None:
+                self.first_sent_at = time.monotonic()
+            self._message_ids.append(response["result"]["message_id"])
+            self._displayed.append(chunk)
+
+        # Keep flushing eagerly until something is actually on screen
+        if self._message_ids:
+            self._last_flush = time.monotonic()
@@ -1,6 +1,6 @@
-from optifeed.api.app import publish_task
 from optifeed.db.sqlite_utils import get_unsent_analyzed_news, mark_as_sent
 from optifeed.utils.logger import logger
+from optifeed.utils.rabbitmq import publish_tasks
 
 MAX_MESSAGE_LENGTH = 4096
 
@@ -56,22 +56,39 @@ def detect_signals_and_push():
         logger.info("🎯 Nothing significant today.")
         return
 
+    alerts = []
     for news in impactful:
         full_message = format_signal_message(news)
         message_parts = split_message(full_message)
 
-        for idx, part in enumerate(message_parts, 1):
-            if len(message_parts) > 1:
-                part = f"*Part {idx}/{len(message_parts)}*\n\n{part}"
-
-            publish_task(
-                {
-                    "type": "alert",
-                    "message": part,
-                }
-            )
-
-        mark_as_sent(news.id)
-        logger.success(f"✅ Sent {len(message_parts)} part(s) for news id {news.id}")
+        if len(message_parts) > 1:
+            message_parts = [
+                f"*Part {idx}/{len(message_parts)}*\n\n{part}"
+                for idx, part in enumerate(message_parts, 1)
+            ]
+
+        # One task per news: the worker fans its parts out to every subscriber
+        alerts.append(
+            {
+                "type": "alert",
+                "messages": message_parts,
+                "news_id": news.id,
+                "broadcast": True,
+                "broadcast_id": f"news-{news.id}",
+            }
+        )
+
+    failed = publish_tasks(alerts)
+    failed_ids = {task["news_id"] for task in failed}
+
+    for alert in alerts:
+        news_id = alert["news_id"]
+        if news_id in failed_ids:
+            logger.warning(f"⚠️ Alert for news id {news_id} not published, will retry.")
+            continue
+        mark_as_sent(news_id)
+        logger.success(
+            f"✅ Sent {len(alert['messages'])} part(s) for news id {news_id}"
+        )
 
     logger.info("🎯 detect_signals_and_push() completed.")
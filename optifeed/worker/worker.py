@@ -1,104 +1,208 @@
+import functools
 import json
+import threading
 import time
-from collections import defaultdict
-from typing import Dict, List
+from typing import Hashable, Optional
 
 import pika
-from pydantic_ai.messages import ModelMessage
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelRequest,
+    ModelResponse,
+    TextPart,
+    UserPromptPart,
+)
 
-from optifeed.telegram.telegram import send_telegram_message
+from optifeed.db.sqlite_utils import (
+    add_subscriber,
+    init_db,
+    is_answer_cache_enabled,
+    remove_subscriber,
+    set_answer_cache_opt_in,
+)
+from optifeed.telegram.telegram import send_telegram_message, send_telegram_messages
 from optifeed.utils.config import (
     ADMIN_USER,
+    ALERT_WORKER_CONCURRENCY,
+    ALERT_WORKER_PREFETCH,
+    ANSWER_CACHE_ENABLED,
+    ASK_WORKER_CONCURRENCY,
+    ASK_WORKER_MAX_QUEUED_PER_USER,
+    ASK_WORKER_PREFETCH,
+    DEFAULT_LLM_MODEL,
+    HISTORY_EVICT_INTERVAL,
+    HISTORY_SUMMARY_MAX_CHARS,
+    LANE_DEPTH_LOG_INTERVAL,
     RABBIT_HOST,
     RABBIT_PASS,
     RABBIT_USER,
+    STREAM_REPLIES,
     TELEGRAM_BOT_USERNAME,
 )
-from optifeed.utils.llm import ask_something
+from optifeed.utils.llm import (
+    ask_something,
+    ask_something_hedged,
+    select_model,
+    stream_something,
+)
 from optifeed.utils.logger import logger
+from optifeed.utils.rabbitmq import (
+    ALERT_QUEUE,
+    ASK_QUEUE,
+    LEGACY_QUEUE,
+    queue_for_task,
+)
+from optifeed.worker.answer_cache import AnswerCache
+from optifeed.worker.dispatcher import KeyedDispatcher
+from optifeed.worker.fanout import broadcast_alert
+from optifeed.worker.history import (
+    ConversationWindow,
+    create_history_store,
+    message_length,
+)
+from optifeed.worker.streaming import TelegramReplyStream
 
-# In-memory storage for conversation history (per user)
-# Key: user_id, Value: list of ModelMessage objects
-conversation_history: Dict[int, List[ModelMessage]] = defaultdict(list)
+# Conversation history storage (per user), shared across worker processes
+history_store = create_history_store()
 
-# Context management settings
-MAX_CONTEXT_LENGTH = 8000  # Maximum characters in context
-MIN_MESSAGES_TO_KEEP = 4  # Always keep at least this many recent messages
-MAX_MESSAGES = 50  # Hard limit on message count
+# Recent answers, reused for similar questions of other users
+answer_cache = AnswerCache()
 
+# Consumer sizing per lane: queue -> (prefetch, concurrency, max queued per key)
+LANES = {
+    ALERT_QUEUE: (ALERT_WORKER_PREFETCH, ALERT_WORKER_CONCURRENCY, None),
+    ASK_QUEUE: (
+        ASK_WORKER_PREFETCH,
+        ASK_WORKER_CONCURRENCY,
+        ASK_WORKER_MAX_QUEUED_PER_USER,
+    ),
+}
 
-def estimate_context_length(messages: List[ModelMessage]) -> int:
-    """Estimate the total character count of the conversation history."""
-    return sum(len(msg.parts[0].content) for msg in messages)
 
+def get_user_history(user_id: int) -> ConversationWindow:
+    """Get conversation history for a specific user."""
+    return history_store.get(user_id)
 
-def trim_history_by_context(messages: List[ModelMessage]) -> List[ModelMessage]:
-    """Trim history to fit within context length while preserving recent messages."""
-    if not messages:
-        return messages
 
-    # Always keep minimum recent messages regardless of length
-    if len(messages) <= MIN_MESSAGES_TO_KEEP:
-        return messages
+def add_history(user_id: int, new_messages: list[ModelMessage]):
+    """Append new messages to the user's conversation window and persist it."""
+    history_store.update(user_id, lambda window: window.extend(new_messages))
 
-    current_length = estimate_context_length(messages)
 
-    # If under limit, return as-is
-    if current_length <= MAX_CONTEXT_LENGTH:
-        return messages
+def clear_user_history(user_id: int):
+    """Clear conversation history for a specific user."""
+    history_store.clear(user_id)
+
+
+SUMMARY_INSTRUCTION_PROMPT = f"""
+You maintain a running summary of a conversation between a user and an assistant.
+Merge the previous summary with the new transcript excerpt into one updated summary.
+Keep facts, names, tickers, numbers and open questions the user may refer back to.
+Write in the language of the conversation, in plain text, in less than {HISTORY_SUMMARY_MAX_CHARS} characters.
+"""
+
+
+def format_transcript(messages: list[ModelMessage]) -> str:
+    """Render user and assistant turns as a plain-text transcript."""
+    lines = []
+    for message in messages:
+        role = "User" if isinstance(message, ModelRequest) else "Assistant"
+        for part in message.parts:
+            if part.part_kind in ("user-prompt", "text") and isinstance(
+                part.content, str
+            ):
+                lines.append(f"{role}: {part.content}")
+    return "\n".join(lines)
+
+
+def compact_history(user_id: int):
+    """Fold turns evicted from the user's window into the rolling summary."""
+    window = history_store.get(user_id)
+    if not window.pending:
+        return
+    folded, previous_summary = list(window.pending), window.summary
 
-    # Start from the end (most recent) and work backwards
-    trimmed_messages = []
-    current_length = 0
+    transcript = format_transcript(folded)
+    prompt = f"Previous summary:\n{previous_summary or '(none)'}\n\nNew transcript:\n{transcript}"
+    try:
+        result = ask_something(
+            prompt,
+            instructions=SUMMARY_INSTRUCTION_PROMPT,
+            call_site="history_summary",
+        )
+    except Exception as e:
+        # Pending turns are kept and folded in after the next question
+        logger.warning(f"⚠️ Failed to summarize history for user {user_id}: {e}")
+        return
 
-    # Keep recent messages that fit within context
-    for message in reversed(messages):
-        message_length = len(message.content)
-        if current_length + message_length <= MAX_CONTEXT_LENGTH:
-            trimmed_messages.insert(0, message)
-            current_length += message_length
-        else:
-            # If we have enough messages, stop here
-            if len(trimmed_messages) >= MIN_MESSAGES_TO_KEEP:
-                break
+    summary = result.output.strip()[:HISTORY_SUMMARY_MAX_CHARS]
 
-    # Ensure we have at least MIN_MESSAGES_TO_KEEP
-    if (
-        len(trimmed_messages) < MIN_MESSAGES_TO_KEEP
-        and len(messages) >= MIN_MESSAGES_TO_KEEP
-    ):
-        trimmed_messages = messages[-MIN_MESSAGES_TO_KEEP:]
+    def fold(latest: ConversationWindow):
+        # Skip if another worker folded these turns in the meantime
+        if (
+            latest.summary == previous_summary
+            and latest.pending[: len(folded)] == folded
+        ):
+            latest.summary = summary
+            del latest.pending[: len(folded)]
 
+    history_store.update(user_id, fold)
     logger.debug(
-        f"🧹 Trimmed history: {len(messages)} -> {len(trimmed_messages)} messages, "
-        f"{estimate_context_length(messages)} -> {estimate_context_length(trimmed_messages)} chars"
+        f"🗜️ Folded {len(folded)} messages into summary for user {user_id} "
+        f"({len(summary)} chars)"
     )
 
-    return trimmed_messages
-
 
-def get_user_history(user_id: int) -> List[ModelMessage]:
-    """Get conversation history for a specific user."""
-    return conversation_history[user_id]
-
-
-def add_history(user_id: int, history_messages: list[ModelMessage]):
-    """Add a message to user's conversation history with intelligent trimming."""
-    conversation_history[user_id] = history_messages
+def answer_stream_reply(
+    user_id: int,
+    prompt: str,
+    message_history: list[ModelMessage],
+    model_name: str = DEFAULT_LLM_MODEL,
+) -> str:
+    """Stream the LLM answer to Telegram as it is generated, save history and return it."""
+    reply = TelegramReplyStream()
+    started = time.monotonic()
+    output, new_messages = stream_something(
+        prompt,
+        on_text=reply.update,
+        message_history=message_history,
+        call_site="ask_stream",
+        model_name=model_name,
+    )
+    reply.finish(output)
+    add_history(user_id, new_messages=new_messages)
 
-    # Apply context-aware trimming
-    conversation_history[user_id] = trim_history_by_context(
-        conversation_history[user_id]
+    if reply.first_sent_at is not None:
+        logger.info(
+            f"⚡ First reply text visible after {reply.first_sent_at - started:.2f}s, "
+            f"complete after {time.monotonic() - started:.2f}s"
+        )
+    return output
+
+
+def answer_from_cache(user_id: int, prompt: str, answer: str):
+    """Send a cached answer and record the exchange as if the LLM had answered."""
+    send_telegram_message(answer)
+    add_history(
+        user_id,
+        new_messages=[
+            ModelRequest(parts=[UserPromptPart(content=prompt)]),
+            ModelResponse(parts=[TextPart(content=answer)]),
+        ],
     )
 
-    # Hard limit on message count as backup
-    if len(conversation_history[user_id]) > MAX_MESSAGES:
-        conversation_history[user_id] = conversation_history[user_id][-MAX_MESSAGES:]
 
+# Prompt size accounting, shared by every dispatcher thread
+_prompt_stats_lock = threading.Lock()
+_prompt_stats = {"asks": 0, "chars": 0}
 
-def clear_user_history(user_id: int):
-    """Clear conversation history for a specific user."""
-    conversation_history[user_id] = []
+
+def record_prompt_size(chars: int) -> int:
+    """Record the size of an ask prompt and return the running average."""
+    with _prompt_stats_lock:
+        _prompt_stats["asks"] += 1
+        _prompt_stats["chars"] += chars
+        return _prompt_stats["chars"] // _prompt_stats["asks"]
 
 
 # --- Task processing
@@ -130,13 +234,38 @@ def process_task(task: dict):
                 response = "🧹 Conversation history cleared!"
                 send_telegram_message(response)
                 return
+            elif query.startswith("/subscribe"):
+                chat_id = message_data.get("chat", {}).get("id", user_id)
+                add_subscriber(chat_id)
+                send_telegram_message(
+                    "🔔 Subscribed to market alerts!", chat_id=chat_id
+                )
+                return
+            elif query.startswith("/unsubscribe"):
+                chat_id = message_data.get("chat", {}).get("id", user_id)
+                remove_subscriber(chat_id)
+                send_telegram_message(
+                    "🔕 Unsubscribed from market alerts.", chat_id=chat_id
+                )
+                return
+            elif query.startswith("/nocache"):
+                set_answer_cache_opt_in(user_id, False)
+                send_telegram_message(
+                    "🙈 Your questions will no longer be answered from, or added to, the shared answer cache."
+                )
+                return
+            elif query.startswith("/cache"):
+                set_answer_cache_opt_in(user_id, True)
+                send_telegram_message(
+                    "♻️ Similar recent questions will be answered from the shared answer cache."
+                )
+                return
             elif query.startswith("/history"):
                 history = get_user_history(user_id)
                 if not history:
                     response = "📝 No conversation history yet."
                 else:
-                    context_length = estimate_context_length(history)
-                    response = f"📝 History: {len(history)} messages, ~{context_length} characters"
+                    response = f"📝 History: {len(history)} messages, ~{history.char_count} characters"
                 send_telegram_message(response)
                 return
 
@@ -145,27 +274,63 @@ def process_task(task: dict):
 
             # Prepare the prompt
             prompt = query
-            if user_id == int(ADMIN_USER):
+            is_admin = user_id == int(ADMIN_USER)
+            if is_admin:
                 prompt += "\nYou're talking to the admin so call it 'my lord' or other fancy name/title."
 
+            # Answers are shared only when they depend on the question alone:
+            # never the admin's, nor those of asks sent with a history or summary
+            message_history = user_history.prompt_messages()
+            use_answer_cache = (
+                ANSWER_CACHE_ENABLED
+                and not is_admin
+                and not message_history
+                and is_answer_cache_enabled(user_id)
+            )
+
             try:
-                # Ask the LLM with conversation history
-                result = ask_something(
-                    f"Question: {prompt}", message_history=user_history
+                # Ask the LLM with conversation history and rolling summary
+                prompt = f"Question: {prompt}"
+                prompt_chars = len(prompt) + sum(
+                    message_length(message) for message in message_history
                 )
-                add_history(user_id, history_messages=result.all_messages())
+                avg_prompt_chars = record_prompt_size(prompt_chars)
+                model_name = select_model(prompt_chars)
+                started = time.monotonic()
+                cached_answer = answer_cache.lookup(query) if use_answer_cache else None
+                if cached_answer is not None:
+                    answer_from_cache(user_id, prompt, cached_answer)
+                elif STREAM_REPLIES:
+                    output = answer_stream_reply(
+                        user_id, prompt, message_history, model_name
+                    )
+                else:
+                    result = ask_something_hedged(
+                        prompt,
+                        message_history=message_history,
+                        model_name=model_name,
+                        call_site="ask",
+                    )
+                    add_history(user_id, new_messages=result.new_messages())
+                    output = result.output
+
+                    # Send response
+                    send_telegram_message(output)
 
-                # Send response
-                send_telegram_message(result.output)
+                if cached_answer is None and use_answer_cache:
+                    answer_cache.store(query, output, time.monotonic() - started)
 
                 # Log context info
                 final_history = get_user_history(user_id)
-                context_length = estimate_context_length(final_history)
                 logger.info(
                     f"✅ Processed question for user {user_id}: {len(final_history)} messages, "
-                    f"~{context_length} chars context"
+                    f"~{final_history.char_count} chars context, "
+                    f"~{avg_prompt_chars} avg prompt chars per ask"
                 )
 
+                # Off the hot path: the reply has already been sent
+                compact_history(user_id)
+
             except Exception as e:
                 logger.error(f"❌ Error processing LLM request: {e}", exc_info=True)
                 error_response = (
@@ -174,26 +339,103 @@ def process_task(task: dict):
                 send_telegram_message(error_response)
 
         case "alert":
-            message = task.get("message", "⚠️ Empty message")
-            send_telegram_message(message)
-            logger.info(f"✅ Sent alert to chat_id {task.get('chat_id')}")
+            messages = task.get("messages") or [task.get("message", "⚠️ Empty message")]
+            if task.get("broadcast"):
+                broadcast_alert(messages, broadcast_id=task.get("broadcast_id"))
+                return
+
+            send_telegram_messages(messages, chat_id=task.get("chat_id"))
+            logger.info(
+                f"✅ Sent {len(messages)} alert message(s) to chat_id {task.get('chat_id')}"
+            )
 
         case _:
             logger.warning(f"⚠️ Unknown task type: {task.get('type')}")
 
 
+def task_ordering_key(task: dict) -> Optional[Hashable]:
+    """Return the key of tasks that must run in order (same user), None otherwise."""
+    if task.get("type") == "ask":
+        message = task.get("data", {}).get("message", {})
+        # Group messages not meant for the bot are skipped, in any order
+        if TELEGRAM_BOT_USERNAME in message.get("text", ""):
+            return message.get("from", {}).get("id")
+    return None
+
+
 # --- RabbitMQ consumer callback
-def callback(ch, method, properties, body):
-    """Callback function for RabbitMQ messages."""
+def make_callback(connection, dispatcher: KeyedDispatcher):
+    """
+    Build a callback handing tasks to the dispatcher instead of running them
+    on the pika I/O thread. Acks are scheduled back on the connection thread.
+    """
+
+    def callback(ch, method, properties, body):
+        try:
+            task = json.loads(body)
+        except json.JSONDecodeError as e:
+            logger.error(f"❌ Failed to decode JSON task: {e}")
+            ch.basic_ack(delivery_tag=method.delivery_tag)
+            return
+
+        def ack():
+            connection.add_callback_threadsafe(
+                functools.partial(ch.basic_ack, delivery_tag=method.delivery_tag)
+            )
+
+        def job():
+            try:
+                process_task(task)
+            finally:
+                ack()
+
+        def turn_down():
+            try:
+                send_telegram_message(
+                    "⏳ Still working on your previous questions, please ask again in a moment."
+                )
+            finally:
+                ack()
+
+        key = task_ordering_key(task)
+        if not dispatcher.submit(key, job):
+            logger.warning(
+                f"⚠️ Too many questions queued for user {key}, turning one down."
+            )
+            dispatcher.submit(None, turn_down)
+
+    return callback
+
+
+def move_legacy_task(ch, method, properties, body):
+    """Republish a task left in the legacy queue to its lane, then ack it."""
     try:
-        task = json.loads(body)
-        process_task(task)
+        queue = queue_for_task(json.loads(body))
     except json.JSONDecodeError as e:
         logger.error(f"❌ Failed to decode JSON task: {e}")
-    except Exception as e:
-        logger.error(f"❌ Unexpected error processing task: {e}", exc_info=True)
-    finally:
         ch.basic_ack(delivery_tag=method.delivery_tag)
+        return
+
+    try:
+        # Confirmed: raises if the broker refuses it
+        ch.basic_publish(
+            exchange="", routing_key=queue, body=body, properties=properties
+        )
+    except pika.exceptions.AMQPError as e:
+        # Left unacked, the task is redelivered when the channel reopens
+        logger.error(f"❌ Failed to move a task to '{queue}': {e}")
+        return
+    ch.basic_ack(delivery_tag=method.delivery_tag)
+    logger.info(f"📦 Moved a task from '{LEGACY_QUEUE}' to '{queue}'.")
+
+
+def log_lane_depths(channel):
+    """Log the number of ready tasks waiting in each lane."""
+    depths = []
+    for queue in LANES:
+        result = channel.queue_declare(queue=queue, passive=True)
+        depths.append(f"{queue}={result.method.message_count}")
+    logger.info(f"📊 Queue depths: {', '.join(depths)}")
 
 
 # --- Worker start with retry
@@ -219,11 +461,49 @@ def start_worker():
         )
         return
 
-    channel = connection.channel()
-    channel.queue_declare(queue="tasks")
-    channel.basic_consume(queue="tasks", on_message_callback=callback)
+    # Subscribers and broadcast checkpoints live in the news database
+    init_db()
+
+    dispatchers = []
+    for queue, (prefetch, concurrency, max_queued_per_key) in LANES.items():
+        channel = connection.channel()
+        channel.queue_declare(queue=queue)
+        channel.basic_qos(prefetch_count=prefetch)
+        dispatcher = KeyedDispatcher(
+            max_workers=concurrency, name=queue, max_queued_per_key=max_queued_per_key
+        )
+        dispatchers.append(dispatcher)
+        channel.basic_consume(
+            queue=queue, on_message_callback=make_callback(connection, dispatcher)
+        )
+        logger.info(
+            f"🐇 Consuming '{queue}' (concurrency={concurrency}, prefetch={prefetch})."
+        )
+
+    # Tasks published to the single queue of earlier releases go to their lane
+    legacy_channel = connection.channel()
+    legacy_channel.queue_declare(queue=LEGACY_QUEUE)
+    legacy_channel.confirm_delivery()
+    legacy_channel.basic_consume(
+        queue=LEGACY_QUEUE, on_message_callback=move_legacy_task
+    )
+
     logger.info("🐇 Worker started. Waiting for tasks...")
-    channel.start_consuming()
+    try:
+        next_depth_log = next_history_evict = time.monotonic()
+        while True:
+            if time.monotonic() >= next_depth_log:
+                log_lane_depths(channel)
+                next_depth_log = time.monotonic() + LANE_DEPTH_LOG_INTERVAL
+            if time.monotonic() >= next_history_evict:
+                evicted = history_store.evict_idle()
+                if evicted:
+                    logger.info(f"🧹 Evicted {evicted} idle conversation(s).")
+                next_history_evict = time.monotonic() + HISTORY_EVICT_INTERVAL
+            connection.process_data_events(time_limit=1)
+    finally:
+        for dispatcher in dispatchers:
+            dispatcher.shutdown(wait=False)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,170 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Settings read at import time by optifeed.utils.config
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="optifeed-tests-"))
+os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "60000")
+
+import pytest  # noqa: E402
+from pydantic_ai.messages import (  # noqa: E402
+    ModelMessage,
+    ModelResponse,
+    TextPart,
+    ToolCallPart,
+)
+from pydantic_ai.models.function import AgentInfo, FunctionModel  # noqa: E402
+
+from optifeed.telegram import telegram  # noqa: E402
+from optifeed.utils import llm  # noqa: E402
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    """
+    Replace Gemini with a FunctionModel giving scripted answers, in order.
+    An answer is a text reply (str), or the arguments of the output tool call
+    (dict, or a JSON string to simulate a malformed one). Returns the list of
+    message histories received, one per request.
+    """
+    answers: list = []
+    requests: list[list[ModelMessage]] = []
+
+    def respond(messages: list[ModelMessage], info: AgentInfo) -> ModelResponse:
+        requests.append(messages)
+        answer = answers.pop(0)
+        if isinstance(answer, str) and not answer.lstrip().startswith("{"):
+            return ModelResponse(parts=[TextPart(answer)])
+        return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, answer)])
+
+    def script(*replies):
+        answers.extend(replies)
+        return requests
+
+    monkeypatch.setattr(llm, "LLM_CACHE_ENABLED", False)
+    monkeypatch.setattr(llm, "get_model", lambda model_name: FunctionModel(respond))
+    llm.get_agent.cache_clear()
+    yield script
+    llm.get_agent.cache_clear()
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    """Gemini API answering "Hello world" to every request, streamed or not."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if ":streamGenerateContent" in self.path:
+            body = "".join(
+                f"data: {json.dumps(self.chunk(text))}\r\n\r\n"
+                for text in ("Hello ", "world")
+            ).encode()
+            content_type = "text/event-stream"
+        else:
+            body = json.dumps(self.chunk("Hello world")).encode()
+            content_type = "application/json"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    @staticmethod
+    def chunk(text: str) -> dict:
+        return {
+            "candidates": [
+                {
+                    "content": {"parts": [{"text": text}], "role": "model"},
+                    "finishReason": "STOP",
+                    "index": 0,
+                }
+            ],
+            "usageMetadata": {"promptTokenCount": 5, "candidatesTokenCount": 2},
+        }
+
+
+@pytest.fixture
+def fake_gemini(monkeypatch):
+    """Point the real Gemini provider at a local fake API server."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGeminiHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv(
+        "GOOGLE_GEMINI_BASE_URL", f"http://127.0.0.1:{server.server_port}"
+    )
+    monkeypatch.setattr(llm, "LLM_CACHE_ENABLED", False)
+    for cached in (llm.get_provider, llm.get_model, llm.get_agent):
+        cached.cache_clear()
+    yield server
+    for cached in (llm.get_provider, llm.get_model, llm.get_agent):
+        cached.cache_clear()
+    server.shutdown()
+
+
+class FakeBotAPI(ThreadingHTTPServer):
+    """Bot API recording sendMessage and editMessageText calls."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeBotAPIHandler)
+        self.calls: list[tuple[str, dict]] = []
+        self.sent_at: list[float] = []  # time.monotonic() of each recorded call
+        self.failures = 0  # Next sendMessage calls to answer with an error
+        self.rate_limited: dict[str, float] = {}  # chat_id -> retry_after, once
+
+
+class FakeBotAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        method = self.path.rsplit("/", 1)[-1]
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        retry_after = self.server.rate_limited.pop(payload.get("chat_id"), None)
+        if retry_after is not None:
+            status, answer = (
+                429,
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "parameters": {"retry_after": retry_after},
+                },
+            )
+        elif method == "sendMessage" and self.server.failures:
+            self.server.failures -= 1
+            status, answer = 400, {"ok": False, "error_code": 400}
+        else:
+            self.server.calls.append((method, payload))
+            self.server.sent_at.append(time.monotonic())
+            message_id = sum(called == "sendMessage" for called, _ in self.server.calls)
+            result = {"message_id": message_id} if method == "sendMessage" else True
+            status, answer = 200, {"ok": True, "result": result}
+        body = json.dumps(answer).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def bot_api(monkeypatch):
+    server = FakeBotAPI()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(
+        telegram, "TELEGRAM_API_URL", f"http://127.0.0.1:{server.server_port}"
+    )
+    monkeypatch.setattr(telegram, "TELEGRAM_CHAT_ID", "42")
+    monkeypatch.setattr(
+        telegram, "sender", telegram.TelegramSender(global_rate=1e6, chat_rate=1e6)
+    )
+    yield server
+    server.shutdown()
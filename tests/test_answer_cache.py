@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+from optifeed.db.sqlite_utils import (
+    init_db,
+    is_answer_cache_enabled,
+    set_answer_cache_opt_in,
+)
+from optifeed.worker import answer_cache as answer_cache_module
+from optifeed.worker.answer_cache import (
+    AnswerCache,
+    cosine,
+    normalize_question,
+    vectorize,
+)
+
+
+def test_normalize_question():
+    assert (
+        normalize_question("  Quel est l'impact de la @Fed sur l'Économie ?! ")
+        == "quel est l impact de la sur l economie"
+    )
+
+
+def test_short_questions_are_not_vectorized():
+    # Follow-ups like "and why?" need the history, so they are never shared
+    assert vectorize(normalize_question("And why?")) == {}
+    assert vectorize(normalize_question("Why is oil rising?"))
+
+
+def test_similar_questions_share_an_answer():
+    cache = AnswerCache(threshold=0.85)
+    cache.store("What is the impact of the Fed rate hike on banks?", "Margins", 2.0)
+
+    assert cache.lookup("What's the impact of the Fed rate hike on banks") == "Margins"
+    assert cache.lookup("What is the impact of the ECB rate cut on tech?") is None
+    assert (cache.hits, cache.lookups) == (1, 2)
+
+
+def test_threshold_bounds_the_similarity():
+    question = "Impact of the Fed rate hike on regional banks"
+    close = "Impact of the Fed rate hike on banks"
+    score = cosine(
+        vectorize(normalize_question(question)), vectorize(normalize_question(close))
+    )
+
+    strict = AnswerCache(threshold=score + 0.01)
+    strict.store(question, "Answer", 1.0)
+    assert strict.lookup(close) is None
+
+    loose = AnswerCache(threshold=score - 0.01)
+    loose.store(question, "Answer", 1.0)
+    assert loose.lookup(close) == "Answer"
+
+
+def test_answers_expire_after_the_ttl(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(
+        answer_cache_module,
+        "time",
+        SimpleNamespace(time=lambda: now.value, perf_counter=lambda: 0.0),
+    )
+    cache = AnswerCache(ttl=60)
+    cache.store("Why are oil prices rising today?", "OPEC cuts", 1.0)
+
+    now.value += 59
+    assert cache.lookup("Why are oil prices rising?") == "OPEC cuts"
+    now.value += 2
+    assert cache.lookup("Why are oil prices rising?") is None
+
+
+def test_users_can_opt_out_of_the_answer_cache():
+    init_db()
+    assert is_answer_cache_enabled(7001)  # In by default
+
+    set_answer_cache_opt_in(7001, False)
+    assert not is_answer_cache_enabled(7001)
+    assert is_answer_cache_enabled(7002)
+
+    set_answer_cache_opt_in(7001, True)
+    assert is_answer_cache_enabled(7001)
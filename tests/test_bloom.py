@@ -0,0 +1,42 @@
+import pytest
+
+from optifeed.utils.bloom import BloomFilter
+
+
+def test_added_keys_are_always_found():
+    bloom = BloomFilter(1000, 0.01)
+    keys = [f"news-{n}" for n in range(1000)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    assert bloom.is_full()
+
+
+def test_false_positives_stay_near_the_error_rate():
+    bloom = BloomFilter(5000, 0.01)
+    for n in range(5000):
+        bloom.add(f"news-{n}")
+
+    false_positives = sum(f"other-{n}" in bloom for n in range(20_000))
+
+    assert false_positives / 20_000 < 0.02
+
+
+def test_filter_survives_serialization():
+    bloom = BloomFilter(100, 0.01)
+    bloom.add("news-1")
+
+    restored = BloomFilter.from_bytes(bloom.to_bytes())
+
+    assert "news-1" in restored
+    assert (restored.capacity, restored.error_rate, restored.count) == (100, 0.01, 1)
+
+
+def test_other_data_is_rejected():
+    data = BloomFilter(100, 0.01).to_bytes()
+
+    with pytest.raises(ValueError):
+        BloomFilter.from_bytes(b"XXXX" + data[4:])
+    with pytest.raises(ValueError):
+        BloomFilter.from_bytes(data[:-1])
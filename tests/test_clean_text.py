@@ -0,0 +1,52 @@
+import re
+import unicodedata
+
+import bs4
+import pytest
+
+from optifeed.bi.news import clean_text
+
+# Plain text, Brave-like snippets and FMP-like HTML bodies
+CORPUS = [
+    "",
+    "Fed holds rates steady as inflation cools",
+    "  Oil   jumps\tafter OPEC+ cut \n\n  extends  ",
+    "AT&T and T-Mobile: Q3 results beat, $T up 3%",
+    "Apple &amp; Microsoft lead gains &mdash; S&amp;P 500 at record",
+    "Rates &lt;5% &quot;unlikely&quot; before 2027, says &#8220;ECB&#8221; chief",
+    "Tesla <strong>deliveries</strong> top estimates; <strong>TSLA</strong> +4%",
+    "<p>Nvidia (NASDAQ:NVDA) rallies.</p><p>Chips&nbsp;stocks follow.</p>",
+    '<div><a href="https://example.com/?a=1&amp;b=2">Read more</a> on <b>Bloomberg</b></div>',
+    "<ul><li>EPS: $1.20</li><li>Revenue: $4.5B</li></ul><br/><img src='x.png' alt='chart'>",
+    "<p>Markets</p><script>var x = '<p>ad</p>';</script><style>p { color: red; }</style>",
+    "<template><p>hidden</p></template>Visible text<!-- a comment -->",
+    "Before<![CDATA[ raw <b>data</b> & more ]]>after",
+    "Full-width ＮＡＳＤＡＱ and ligature ﬁnance, ¹²³ and ½ — “quoted” ‘text’",
+    "<p>Café, naïve, Zürich: ﬁscal ＥＣＢ policy update</p>",
+    "Line separator and　ideographic space",
+    "<p>Unclosed <b>bold and <i>italic",
+    "5 < 6 and 7 > 3, no tags here",
+    "<P CLASS='x'>Upper-case tags</P><SCRIPT>alert(1)</SCRIPT>",
+]
+
+
+def reference_clean(text: str) -> str:
+    """BeautifulSoup get_text followed by the former normalize_text."""
+    text = bs4.BeautifulSoup(text or "", "html.parser").get_text()
+    text = unicodedata.normalize("NFKC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+@pytest.mark.parametrize("text", CORPUS)
+def test_clean_text_matches_beautifulsoup(text):
+    assert clean_text(text) == reference_clean(text)
+
+
+def test_clean_text_of_none():
+    assert clean_text(None) == ""
+
+
+def test_bare_ampersands_are_kept():
+    # Unlike get_text, which drops the "&" of a trailing "S&P"
+    assert clean_text("Futures on the S&P") == "Futures on the S&P"
+    assert clean_text("<b>AT&T</b> and S&P") == "AT&T and S&P"
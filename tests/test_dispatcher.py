@@ -0,0 +1,48 @@
+import threading
+import time
+
+from optifeed.worker.dispatcher import KeyedDispatcher
+
+
+def wait_for(condition, timeout: float = 5.0):
+    """Poll until `condition()` holds: shutdown drops jobs still queued."""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_jobs_of_a_key_run_in_order_up_to_the_cap():
+    dispatcher = KeyedDispatcher(max_workers=4, max_queued_per_key=2)
+    release, ran = threading.Event(), []
+
+    def job(name):
+        def run():
+            if name == "a0":
+                release.wait(5)
+            ran.append(name)
+
+        return run
+
+    accepted = [dispatcher.submit("a", job(f"a{n}")) for n in range(5)]
+    assert accepted == [True, True, True, False, False]  # One running, two queued
+
+    # Other keys are neither capped nor held up by the busy one
+    assert dispatcher.submit("b", job("b0"))
+    assert dispatcher.submit(None, job("none"))
+    release.set()
+    wait_for(lambda: len(ran) == 5)
+    dispatcher.shutdown()
+
+    assert [name for name in ran if name.startswith("a")] == ["a0", "a1", "a2"]
+    assert ran.index("b0") < ran.index("a0")
+
+
+def test_keys_are_uncapped_by_default():
+    dispatcher = KeyedDispatcher(max_workers=1)
+    ran = []
+
+    assert all(dispatcher.submit("a", lambda n=n: ran.append(n)) for n in range(50))
+    wait_for(lambda: len(ran) == 50)
+    dispatcher.shutdown()
+
+    assert ran == list(range(50))
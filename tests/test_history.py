@@ -0,0 +1,159 @@
+from types import SimpleNamespace
+
+from pydantic_ai.messages import (
+    ModelRequest,
+    ModelResponse,
+    SystemPromptPart,
+    TextPart,
+    UserPromptPart,
+)
+
+from optifeed.worker import history
+from optifeed.worker.history import (
+    ConversationWindow,
+    InMemoryHistoryStore,
+    SQLiteHistoryStore,
+    deserialize_messages,
+    serialize_messages,
+)
+
+
+def ask(text: str) -> ModelRequest:
+    return ModelRequest(parts=[UserPromptPart(text)])
+
+
+def answer(text: str) -> ModelResponse:
+    return ModelResponse(parts=[TextPart(text)])
+
+
+def turns(count: int, size: int = 10) -> list:
+    """`count` question/answer pairs of `size` characters each."""
+    messages = []
+    for n in range(count):
+        messages += [ask(f"{n}".ljust(size, "q")), answer(f"{n}".ljust(size, "a"))]
+    return messages
+
+
+def test_window_evicts_the_oldest_messages_over_budget():
+    window = ConversationWindow(max_chars=100, max_messages=50, min_messages=2)
+
+    evicted = window.extend(turns(6))  # 12 messages of 10 chars
+
+    assert len(evicted) == 2
+    assert window.char_count == 100 == sum(map(history.message_length, window.messages))
+    assert window.pending == evicted
+
+
+def test_window_caps_the_message_count_and_keeps_a_minimum():
+    window = ConversationWindow(max_chars=10_000, max_messages=4, min_messages=2)
+    window.extend(turns(5))
+    assert len(window) == 4
+
+    window = ConversationWindow(max_chars=5, max_messages=50, min_messages=2)
+    window.extend(turns(3))
+    assert len(window) == 2  # Over the char budget, but the last turn stays
+
+
+def test_window_never_starts_with_an_orphan_response():
+    window = ConversationWindow(max_chars=100, max_messages=3, min_messages=1)
+
+    window.extend(turns(2))
+
+    assert isinstance(window.messages[0], ModelRequest)
+    assert len(window) == 2
+    assert [type(message) for message in window.pending] == [
+        ModelRequest,
+        ModelResponse,
+    ]
+
+
+def test_pending_backlog_is_capped():
+    window = ConversationWindow(max_chars=10_000, max_messages=4, min_messages=2)
+
+    messages = turns(10)
+    window.extend(messages)
+
+    assert window.messages == messages[16:]
+    assert window.pending == messages[12:16]  # The oldest unsummarized are dropped
+
+
+def test_summary_is_sent_ahead_of_the_history():
+    window = ConversationWindow(turns(1), summary="Talked about oil.")
+
+    first = window.prompt_messages()[0]
+
+    assert isinstance(first.parts[0], SystemPromptPart)
+    assert "Talked about oil." in first.parts[0].content
+    assert first.parts[1] == window.messages[0].parts[0]
+    assert len(window.messages[0].parts) == 1  # The window itself is unchanged
+
+
+def test_messages_survive_serialization():
+    messages = turns(3)
+    assert deserialize_messages(serialize_messages(messages)) == messages
+
+
+def test_cached_window_is_revalidated_by_version(tmp_path):
+    db_file = str(tmp_path / "history.db")
+    worker, other_worker = SQLiteHistoryStore(db_file), SQLiteHistoryStore(db_file)
+    worker.update(1, lambda window: window.extend(turns(1)))
+
+    assert worker.get(1) is worker.get(1)  # Cache hit, nothing decoded
+
+    other_worker.update(1, lambda window: window.extend(turns(1)))
+
+    assert len(worker.get(1)) == 4
+
+
+def test_concurrent_updates_are_not_lost(tmp_path):
+    db_file = str(tmp_path / "history.db")
+    worker, other_worker = SQLiteHistoryStore(db_file), SQLiteHistoryStore(db_file)
+    worker.update(1, lambda window: window.extend(turns(1)))
+
+    stale = worker.get(1)
+    other_worker.update(1, lambda window: window.append(ask("From the other worker")))
+    stale.append(ask("From this worker"))
+    assert not worker.save(1, stale)
+
+    worker.update(1, lambda window: window.append(ask("From this worker")))
+    contents = [message.parts[0].content for message in worker.get(1).messages]
+    assert contents[-2:] == ["From the other worker", "From this worker"]
+
+
+def test_new_histories_are_not_overwritten(tmp_path):
+    db_file = str(tmp_path / "history.db")
+    worker, other_worker = SQLiteHistoryStore(db_file), SQLiteHistoryStore(db_file)
+    fresh = worker.get(1)
+
+    other_worker.update(1, lambda window: window.extend(turns(1)))
+    fresh.extend(turns(2))
+
+    assert not worker.save(1, fresh)
+    assert len(worker.get(1)) == 2
+
+
+def test_idle_histories_expire(tmp_path, monkeypatch):
+    now = SimpleNamespace(value=1_000_000.0)
+    monkeypatch.setattr(
+        history,
+        "time",
+        SimpleNamespace(time=lambda: now.value, time_ns=lambda: int(now.value * 1e9)),
+    )
+    for store in (
+        SQLiteHistoryStore(str(tmp_path / "history.db"), ttl=60),
+        InMemoryHistoryStore(ttl=60),
+    ):
+        store.update(1, lambda window: window.extend(turns(1)))
+        store.update(2, lambda window: window.extend(turns(1)))
+
+        now.value += 30
+        store.update(2, lambda window: window.extend(turns(1)))
+        now.value += 31
+        assert len(store.get(1)) == 0
+        assert len(store.get(2)) == 4
+
+        assert store.evict_idle() == 1
+        now.value += 61
+        # An expired history is replaced, not merged into
+        store.update(2, lambda window: window.extend(turns(1)))
+        assert len(store.get(2)) == 2
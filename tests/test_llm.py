@@ -0,0 +1,199 @@
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import FunctionModel
+
+from optifeed.utils import llm
+from optifeed.utils.llm import ask_hedged, ask_something, select_model, stream_something
+from optifeed.utils.llm_executor import LLMExecutor
+from optifeed.utils.llm_loop import get_llm_loop
+from optifeed.worker.dispatcher import KeyedDispatcher
+
+
+def test_ask_from_worker_threads(fake_gemini):
+    dispatcher = KeyedDispatcher(max_workers=4, name="ask")
+    answers, lock = [], threading.Lock()
+
+    def job():
+        output = ask_something("Bonjour ?").output
+        with lock:
+            answers.append(output)
+
+    for user_id in range(8):
+        dispatcher.submit(user_id, job)
+    dispatcher.shutdown()
+
+    # The shared client keeps working for the main thread afterwards
+    assert ask_something("Bonjour ?").output == "Hello world"
+    assert answers == ["Hello world"] * 8
+
+
+def test_map_asks_concurrently(fake_gemini):
+    executor = LLMExecutor(concurrency=4)
+
+    results = dict(executor.map(lambda n: ask_something(f"Question {n}"), range(8)))
+
+    assert sorted(results) == list(range(8))
+    assert {result.output for result in results.values()} == {"Hello world"}
+
+
+def test_only_paced_calls_wait_for_quota():
+    executor = LLMExecutor(rpm=60)  # One token per second, no burst
+
+    async def answer():
+        return "ok"
+
+    started = time.monotonic()
+    assert [executor.call(answer, paced=False) for _ in range(3)] == ["ok"] * 3
+    assert time.monotonic() - started < 0.5
+
+    started = time.monotonic()
+    executor.call(answer)
+    executor.call(answer)
+    assert time.monotonic() - started >= 0.9
+
+
+def test_stream_runs_callbacks_in_the_calling_thread(fake_gemini):
+    for _ in range(2):  # The second stream reuses the client of the first
+        updates = []
+        output, new_messages = stream_something(
+            "Bonjour ?",
+            on_text=lambda text: updates.append((text, threading.current_thread())),
+        )
+
+        assert output == "Hello world"
+        assert [text for text, _ in updates] == ["Hello ", "Hello world"]
+        assert {thread for _, thread in updates} == {threading.current_thread()}
+        assert len(new_messages) == 2
+    assert ask_something("Bonjour ?").output == "Hello world"
+
+
+@pytest.fixture
+def slow_gemini(monkeypatch):
+    """
+    Replace Gemini with a FunctionModel whose n-th request sleeps, then
+    answers or raises, as scripted with (seconds, answer or exception) pairs.
+    Returns the script and the indexes of the requests that were cancelled.
+    """
+    script: list[tuple[float, object]] = []
+    cancelled: list[int] = []
+    sent = []
+
+    async def respond(messages, info) -> ModelResponse:
+        index = len(sent)
+        sent.append(index)
+        seconds, answer = script[index]
+        try:
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            cancelled.append(index)
+            raise
+        if isinstance(answer, Exception):
+            raise answer
+        return ModelResponse(parts=[TextPart(answer)])
+
+    monkeypatch.setattr(llm, "LLM_CACHE_ENABLED", False)
+    monkeypatch.setattr(llm, "get_model", lambda model_name: FunctionModel(respond))
+    llm.get_agent.cache_clear()
+    yield SimpleNamespace(script=script, sent=sent, cancelled=cancelled)
+    llm.get_agent.cache_clear()
+
+
+def test_no_hedge_when_the_first_request_answers_in_time(slow_gemini):
+    slow_gemini.script.extend([(0, "first")])
+
+    assert get_llm_loop().run(ask_hedged("Bonjour ?", delay=0.5)).output == "first"
+    assert slow_gemini.sent == [0]
+
+
+def test_hedge_is_sent_after_the_delay_and_cancels_the_slow_request(slow_gemini):
+    slow_gemini.script.extend([(5, "first"), (0, "hedge")])
+
+    started = time.monotonic()
+    assert get_llm_loop().run(ask_hedged("Bonjour ?", delay=0.1)).output == "hedge"
+    assert 0.1 <= time.monotonic() - started < 1
+    time.sleep(0.05)  # Let the loop run the cancellation
+    assert slow_gemini.cancelled == [0]
+
+
+def test_first_answer_wins_and_cancels_the_hedge(slow_gemini):
+    slow_gemini.script.extend([(0.3, "first"), (5, "hedge")])
+
+    assert get_llm_loop().run(ask_hedged("Bonjour ?", delay=0.1)).output == "first"
+    time.sleep(0.05)
+    assert slow_gemini.cancelled == [1]
+
+
+def test_hedged_ask_raises_the_first_error_when_both_fail(slow_gemini):
+    slow_gemini.script.extend([(0.3, ValueError("first")), (0, ValueError("hedge"))])
+
+    with pytest.raises(ValueError, match="first"):
+        get_llm_loop().run(ask_hedged("Bonjour ?", delay=0.1))
+    assert slow_gemini.sent == [0, 1]
+
+
+def test_hedge_delay_does_not_wait_for_quota(slow_gemini, monkeypatch):
+    executor = LLMExecutor(rpm=1)
+    executor.call(asyncio.sleep, 0)  # Take the only token of the next minute
+    monkeypatch.setattr(llm, "llm_executor", executor)
+    slow_gemini.script.extend([(5, "first"), (0, "hedge")])
+
+    started = time.monotonic()
+    assert get_llm_loop().run(ask_hedged("Bonjour ?", delay=0.1)).output == "hedge"
+    assert time.monotonic() - started < 1
+
+
+def test_recorded_latency_is_the_model_call_only(slow_gemini, monkeypatch):
+    latencies = []
+    metrics = SimpleNamespace(
+        record=lambda site, model, latency, **kw: latencies.append(latency)
+    )
+    monkeypatch.setattr(llm, "get_llm_metrics", lambda: metrics)
+    monkeypatch.setattr(llm, "llm_executor", LLMExecutor(rpm=60))
+    slow_gemini.script.extend([(0, "first"), (0, "second")])
+
+    started = time.monotonic()
+    ask_something("Bonjour ?", paced=True)
+    ask_something("Bonjour ?", paced=True)  # Waits ~1 s for a token
+
+    assert time.monotonic() - started >= 0.9
+    assert len(latencies) == 2 and max(latencies) < 0.5
+
+
+def test_select_model_picks_the_smallest_tier_that_fits(monkeypatch):
+    monkeypatch.setattr(
+        llm, "LLM_MODEL_TIERS", [(100, "small"), (1000, "medium"), (None, "large")]
+    )
+    assert [select_model(chars) for chars in (0, 100, 101, 1000, 50_000)] == [
+        "small",
+        "small",
+        "medium",
+        "medium",
+        "large",
+    ]
+
+    # Without an unbounded tier, oversized prompts fall back to the default model
+    monkeypatch.setattr(llm, "LLM_MODEL_TIERS", [(100, "small")])
+    assert select_model(500) == llm.DEFAULT_LLM_MODEL
+
+
+def test_import_starts_nothing(tmp_path):
+    script = (
+        "import threading, optifeed.utils.llm, optifeed.worker.worker; "
+        "print(sorted(t.name for t in threading.enumerate()))"
+    )
+    env = {**os.environ, "DATA_DIR": str(tmp_path), "HISTORY_BACKEND": "memory"}
+
+    threads = subprocess.run(
+        [sys.executable, "-c", script], env=env, capture_output=True, text=True
+    ).stdout
+
+    assert "MainThread" in threads and "llm-loop" not in threads
+    assert not list(tmp_path.glob("llm_*.db"))
@@ -0,0 +1,115 @@
+import json
+
+from optifeed.bi.macro_analyzer import analyze_macro, analyze_macro_batch
+from optifeed.db.models import NewsItem
+from optifeed.utils.config import LLM_OUTPUT_RETRIES
+
+
+def news(news_id: str) -> NewsItem:
+    return NewsItem(
+        id=news_id,
+        text=f"Central bank raises rates ({news_id})",
+        tickers="SPY",
+        date="2026-10-17T08:00:00+00:00",
+        source="test",
+    )
+
+
+def analysis(**overrides) -> dict:
+    return {
+        "impact_score": -0.4,
+        "magnitude_score": 0.7,
+        "reasoning": "Des taux plus hauts pèsent sur les actions.",
+        "affected_sectors": ["Financials"],
+        "affected_stocks": ["SPY", "XLF"],
+        **overrides,
+    }
+
+
+def test_valid_answer(gemini):
+    requests = gemini(analysis())
+
+    result = analyze_macro(news("a"))
+
+    assert len(requests) == 1
+    assert result.id == "a"
+    assert result.impact_score == -0.4
+    assert result.magnitude_score == 0.7
+    assert result.affected_sectors == ["Financials"]
+
+
+def test_fenced_text_answer_is_re_asked(gemini):
+    fenced = f"```json\n{json.dumps(analysis())}\n```"
+    requests = gemini(fenced, analysis(impact_score=0.1))
+
+    result = analyze_macro(news("a"))
+
+    assert len(requests) == 2
+    assert result.impact_score == 0.1
+
+
+def test_malformed_answer_is_re_asked(gemini):
+    requests = gemini('{"impact_score": 0.2, "magnitude', analysis())
+
+    result = analyze_macro(news("a"))
+
+    assert len(requests) == 2
+    assert result.impact_score == -0.4
+
+
+def test_out_of_range_score_is_re_asked(gemini):
+    requests = gemini(analysis(impact_score=3), analysis())
+
+    result = analyze_macro(news("a"))
+
+    assert len(requests) == 2
+    assert result.impact_score == -0.4
+
+
+def test_answer_still_invalid_after_retries(gemini):
+    requests = gemini(*[analysis(magnitude_score=-1)] * (LLM_OUTPUT_RETRIES + 1))
+
+    assert analyze_macro(news("a")) is None
+    assert len(requests) == LLM_OUTPUT_RETRIES + 1
+
+
+def test_batch_answer_in_input_order(gemini):
+    items = [news(news_id) for news_id in "abc"]
+    entries = [
+        {"id": number, **analysis(impact_score=score)}
+        for number, score in ((3, 0.3), (1, 0.1), (2, 0.2))
+    ]
+    requests = gemini({"response": entries})
+
+    results = analyze_macro_batch(items)
+
+    assert len(requests) == 1
+    assert [result.id for result in results] == ["a", "b", "c"]
+    assert [result.impact_score for result in results] == [0.1, 0.2, 0.3]
+
+
+def test_batch_invalid_entry_is_analyzed_alone(gemini):
+    items = [news(news_id) for news_id in "abcde"]
+    entries = [{"id": number, **analysis()} for number in range(1, 6)]
+    entries[2]["impact_score"] = 3
+    requests = gemini({"response": entries}, analysis(impact_score=0.5))
+
+    results = analyze_macro_batch(items)
+
+    assert len(requests) == 2
+    assert "News 3:" in str(requests[0]) and "News 1:" not in str(requests[1])
+    assert [result.impact_score for result in results] == [-0.4, -0.4, 0.5, -0.4, -0.4]
+
+
+def test_batch_answer_with_unknown_numbers_falls_back(gemini):
+    items = [news(news_id) for news_id in "ab"]
+    entries = [{"id": 1, **analysis()}, {"id": 7, **analysis()}]
+    requests = gemini({"response": entries}, analysis(impact_score=0.5))
+
+    results = analyze_macro_batch(items)
+
+    assert len(requests) == 2
+    assert [(result.id, result.impact_score) for result in results] == [
+        ("a", -0.4),
+        ("b", 0.5),
+    ]
@@ -0,0 +1,43 @@
+from optifeed.bi.micro_analyzer import analyze_micro
+from optifeed.db.models import AnalyzedNews, TickerKPIs
+
+NEWS = AnalyzedNews(
+    id="a",
+    text="Des taux plus hauts pèsent sur les actions.",
+    impact_score=-0.4,
+    magnitude_score=0.7,
+    affected_sectors=["Financials"],
+)
+KPIS = TickerKPIs(ticker="JPM", company_name="JPMorgan Chase", pe_ratio=12.5)
+
+
+def micro_analysis(**overrides) -> dict:
+    return {
+        "micro_score": 0.3,
+        "rationale": "Les banques profitent de marges d'intérêt plus larges.",
+        "suggested_action": "buy",
+        **overrides,
+    }
+
+
+def test_micro_analysis(gemini):
+    requests = gemini(micro_analysis())
+
+    tendency = analyze_micro(NEWS, KPIS)
+
+    assert len(requests) == 1
+    prompt = str(requests[0])
+    assert "JPMorgan Chase" in prompt and "Financials" in prompt
+    assert tendency.ticker == "JPM"
+    assert tendency.news_id == "a"
+    assert tendency.micro_score == 0.3
+    assert tendency.suggested_action == "buy"
+
+
+def test_unknown_action_is_re_asked(gemini):
+    requests = gemini(micro_analysis(suggested_action="yolo"), micro_analysis())
+
+    tendency = analyze_micro(NEWS, KPIS)
+
+    assert len(requests) == 2
+    assert tendency.suggested_action == "buy"
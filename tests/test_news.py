@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from optifeed.bi.news import parse_absolute_date, parse_date, theme_matcher
+
+
+def test_theme_keywords_match_whole_words_and_plurals():
+    assert theme_matcher.match("Two wars weigh on markets") == ["war_geo"]
+    assert theme_matcher.match("An award for the CEO") == []
+
+
+def test_theme_keywords_match_beyond_lowercase():
+    # "İ".lower() is two code points, but the regex matches it to "i"
+    assert theme_matcher.match("İran sanctions tighten") == ["war_geo"]
+    assert theme_matcher.match("IRAN SANCTIONS TIGHTEN") == ["war_geo"]
+
+
+@pytest.mark.parametrize(
+    "headline, themes",
+    [
+        ("Russian troops advance", ["war_geo"]),
+        ("Israeli strikes hit Gaza", ["war_geo", "strikes"]),
+        ("Chinese exports slow", ["war_geo"]),
+        ("Warfare escalates in the east", ["war_geo"]),
+        ("Hackers hacked the bank", ["cyber"]),
+        ("Cybersecurity firm raises funds", ["cyber"]),
+        ("Flooding hits Texas", ["climate"]),
+        ("Voters head to polls", ["elections"]),
+        ("Workers striking at the port", ["strikes"]),
+        ("Merger talks downgraded", ["m&a", "downgrade"]),
+    ],
+)
+def test_theme_keywords_match_inflections_and_demonyms(headline, themes):
+    assert theme_matcher.match(headline) == themes
+
+
+def test_theme_keywords_do_not_match_inside_words():
+    assert theme_matcher.match("Federal recipients warn of a software glitch") == []
+
+
+@pytest.mark.parametrize(
+    "date_str, expected",
+    [
+        # ISO 8601 with an offset
+        ("2026-10-17T08:00:00+02:00", datetime(2026, 10, 17, 6, tzinfo=timezone.utc)),
+        # FMP: ISO without offset, read as local time
+        (
+            "2026-10-17 08:00:00",
+            datetime(2026, 10, 17, 8).astimezone(timezone.utc),
+        ),
+        # RFC 2822, as in RSS feeds, through dateutil
+        (
+            "Sat, 17 Oct 2026 08:00:00 GMT",
+            datetime(2026, 10, 17, 8, tzinfo=timezone.utc),
+        ),
+        ("not a date", None),
+        ("", None),
+    ],
+)
+def test_parse_absolute_dates(date_str, expected):
+    assert parse_date(date_str) == expected
+
+
+def test_parse_relative_dates():
+    expected = datetime.now(timezone.utc) - timedelta(hours=2)
+    assert abs(parse_date("2 hours ago") - expected) < timedelta(seconds=5)
+
+    expected = datetime.now(timezone.utc) - timedelta(days=1)
+    assert abs(parse_date("1 day ago") - expected) < timedelta(seconds=5)
+
+
+def test_only_absolute_dates_are_cached():
+    parse_absolute_date.cache_clear()
+
+    parse_date("2026-10-17T08:00:00+00:00")
+    parse_date("2026-10-17T08:00:00+00:00")
+    parse_date("3 minutes ago")
+
+    info = parse_absolute_date.cache_info()
+    assert (info.hits, info.currsize) == (1, 1)
@@ -0,0 +1,79 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from optifeed.utils import rate_limit
+from optifeed.utils.rate_limit import TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Manual clock: sleeping advances it instead of waiting."""
+    now = SimpleNamespace(value=1000.0, slept=0.0)
+
+    def sleep(seconds):
+        now.value += seconds
+        now.slept += seconds
+
+    monkeypatch.setattr(
+        rate_limit, "time", SimpleNamespace(monotonic=lambda: now.value, sleep=sleep)
+    )
+    return now
+
+
+def test_bucket_allows_a_burst_then_paces(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.slept == 0
+
+    bucket.acquire()
+    assert clock.slept == pytest.approx(0.5)
+
+
+def test_bucket_refills_up_to_its_capacity(clock):
+    bucket = TokenBucket(rate=1, capacity=2)
+    bucket.acquire()
+    bucket.acquire()
+
+    clock.value += 60  # Idle for long, but the burst stays capped
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.slept == pytest.approx(1.0)
+
+
+def test_paused_bucket_waits_out_the_pause(clock):
+    bucket = TokenBucket(rate=10, capacity=5)
+
+    bucket.pause(3)
+    bucket.acquire()
+
+    assert clock.slept == pytest.approx(3.1)  # The pause, then a fresh token
+
+
+def test_async_acquire_paces_without_blocking_the_loop():
+    bucket = TokenBucket(rate=20)
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    async def acquire_three():
+        ticker = asyncio.create_task(tick())
+        started = time.monotonic()
+        for _ in range(3):
+            await bucket.acquire_async()
+        elapsed = time.monotonic() - started
+        ticker.cancel()
+        return elapsed
+
+    elapsed = asyncio.run(acquire_three())
+
+    assert elapsed >= 0.09
+    assert ticks >= 5  # The loop kept running while the bucket waited
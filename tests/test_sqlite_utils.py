@@ -0,0 +1,103 @@
+import pytest
+
+from optifeed.bi.news import collapse_near_duplicates
+from optifeed.db import sqlite_utils
+from optifeed.db.models import AnalyzedNews, NewsItem
+from optifeed.db.sqlite_utils import (
+    SeenIds,
+    filter_uncached,
+    get_seen_ids,
+    get_unanalyzed_stories,
+    init_db,
+    save_analyzed_news,
+    save_news_items,
+)
+
+
+def news(*ids: str) -> list[NewsItem]:
+    return [
+        NewsItem(id=news_id, text=news_id, date="2026-10-17", source="test")
+        for news_id in ids
+    ]
+
+
+@pytest.fixture
+def fresh_db(tmp_path, monkeypatch):
+    """Point the module at an empty database; returns a switch to another one."""
+
+    def use(name: str):
+        monkeypatch.setattr(sqlite_utils, "SQL_DB_FILE", str(tmp_path / name))
+        init_db()
+        get_seen_ids.cache_clear()
+
+    use("news.db")
+    yield use
+    get_seen_ids.cache_clear()
+
+
+def test_failed_analyses_are_retried():
+    init_db()
+    items = [
+        NewsItem(
+            id=f"retry-{n}",
+            text=f"Story {n}",
+            headline=headline,
+            date="2026-10-17T08:00:00+00:00",
+            source="test",
+        )
+        for n, headline in enumerate(
+            [
+                "Oil prices jump as OPEC agrees to deeper output cuts",
+                "Oil prices jump as OPEC agrees to deeper output cuts!",
+                "Chipmaker shares slide after export curbs widen",
+            ]
+        )
+    ]
+    save_news_items(items)
+    stories = collapse_near_duplicates(items)
+    assert [story.id for story in stories] == ["retry-0", "retry-2"]
+
+    # Only retry-0 was analyzed: retry-2 is retried, its duplicate never is
+    save_analyzed_news(AnalyzedNews(id="retry-0", text="Analyse"))
+
+    retries = [item.id for item in get_unanalyzed_stories(days=1)]
+    assert retries == ["retry-2"]
+
+
+def test_seen_ids_add_rows_inserted_since_the_last_save(fresh_db, tmp_path):
+    path = str(tmp_path / "seen.bloom")
+    save_news_items(news("a", "b"))
+    assert SeenIds.load(path).last_rowid == 2
+
+    save_news_items(news("c"))
+    seen = SeenIds.load(path)
+
+    assert all(news_id in seen for news_id in "abc")
+    assert seen.last_rowid == 3
+
+
+def test_seen_ids_are_rebuilt_for_another_database(fresh_db, tmp_path):
+    path = str(tmp_path / "seen.bloom")
+    save_news_items(news("a", "b", "c"))
+    SeenIds.load(path)
+
+    fresh_db("restored.db")  # Same row count, other ids
+    save_news_items(news("x", "y", "z"))
+    assert all(news_id in SeenIds.load(path) for news_id in "xyz")
+
+    fresh_db("smaller.db")  # Fewer rows than the filter has seen
+    save_news_items(news("q"))
+    seen = SeenIds.load(path)
+    assert "q" in seen
+    assert seen.last_rowid == 1
+
+
+def test_filter_uncached_confirms_possible_positives(fresh_db):
+    save_news_items(news("a", "b"))
+    get_seen_ids().bloom.add("ghost")  # A false positive of the filter
+
+    assert filter_uncached(["new", "a", "ghost", "b", "other"]) == [
+        "new",
+        "ghost",
+        "other",
+    ]
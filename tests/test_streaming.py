@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+import pytest
+
+from optifeed.worker import streaming
+from optifeed.worker.streaming import TelegramReplyStream
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Manual clock for the stream's edit throttle."""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(streaming, "time", SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def test_first_text_is_sent_then_edits_are_throttled(bot_api, clock):
+    reply = TelegramReplyStream(edit_interval=1.0)
+
+    reply.update("Les")
+    assert bot_api.calls == [("sendMessage", {"chat_id": "42", "text": "Les"})]
+    assert reply.first_sent_at == 1000.0
+
+    clock.value += 0.5
+    reply.update("Les taux")
+    assert len(bot_api.calls) == 1
+
+    clock.value += 0.5
+    reply.update("Les taux montent")
+    assert bot_api.calls[1] == (
+        "editMessageText",
+        {"chat_id": "42", "text": "Les taux montent", "message_id": 1},
+    )
+
+    reply.finish("Les taux montent.")
+    reply.finish("Les taux montent.")  # Unchanged, not edited again
+    assert [payload["text"] for _, payload in bot_api.calls] == [
+        "Les",
+        "Les taux montent",
+        "Les taux montent.",
+    ]
+
+
+def test_failed_first_send_is_retried_without_throttle(bot_api, clock):
+    reply = TelegramReplyStream(edit_interval=1.0)
+    bot_api.failures = 1
+
+    reply.update("Les")
+    reply.update("Les taux")
+
+    assert bot_api.calls == [("sendMessage", {"chat_id": "42", "text": "Les taux"})]
+
+
+def test_long_reply_continues_in_a_new_message(bot_api, clock):
+    reply = TelegramReplyStream(edit_interval=1.0)
+    first, second = "a" * 4000, "b" * 200
+
+    reply.update(first)
+    reply.finish(f"{first}\n{second}")
+
+    assert [
+        (method, payload.get("message_id")) for method, payload in bot_api.calls
+    ] == [
+        ("sendMessage", None),
+        ("sendMessage", None),
+    ]
+    assert [payload["text"] for _, payload in bot_api.calls] == [first, second]
+
+    reply.finish(f"{first}\n{second}!")
+    assert bot_api.calls[-1] == (
+        "editMessageText",
+        {"chat_id": "42", "text": f"{second}!", "message_id": 2},
+    )
@@ -0,0 +1,64 @@
+import time
+
+from optifeed.telegram.telegram import TelegramSender
+
+
+def sent_texts(bot_api, chat_id: str) -> list[str]:
+    return [
+        payload["text"]
+        for method, payload in bot_api.calls
+        if payload["chat_id"] == chat_id
+    ]
+
+
+def test_rate_limited_chat_does_not_hold_up_the_others(bot_api):
+    sender = TelegramSender(global_rate=1e6, chat_rate=1e6, concurrency=2)
+    bot_api.rate_limited["1"] = 0.5
+    messages = [(chat_id, f"{chat_id}-{n}") for n in range(3) for chat_id in "123"]
+
+    started = time.monotonic()
+    responses = sender.send_many(messages, parse_mode=None)
+
+    assert all(response["ok"] for response in responses)
+    for chat_id in "123":
+        assert sent_texts(bot_api, chat_id) == [f"{chat_id}-{n}" for n in range(3)]
+    others_done = max(
+        at
+        for at, (_, payload) in zip(bot_api.sent_at, bot_api.calls)
+        if payload["chat_id"] != "1"
+    )
+    assert others_done - started < 0.3  # Did not wait for chat 1's retry_after
+    assert time.monotonic() - started >= 0.5
+
+
+def test_rate_limited_message_is_retried_after_the_hint(bot_api):
+    sender = TelegramSender(global_rate=1e6, chat_rate=1e6)
+    bot_api.rate_limited["7"] = 0.3
+
+    started = time.monotonic()
+    response = sender.send_message("7", "hello", parse_mode=None)
+
+    assert response["ok"]
+    assert bot_api.sent_at[0] - started >= 0.3
+    assert sent_texts(bot_api, "7") == ["hello"]
+
+
+def test_each_chat_is_paced_on_its_own(bot_api):
+    sender = TelegramSender(global_rate=1e6, chat_rate=10)
+
+    started = time.monotonic()
+    sender.send_many([(chat_id, "hi") for chat_id in "123"], parse_mode=None)
+    assert time.monotonic() - started < 0.1
+
+    started = time.monotonic()
+    sender.send_many([("4", "hi")] * 3, parse_mode=None)
+    assert time.monotonic() - started >= 0.2
+
+
+def test_sends_are_paced_globally(bot_api):
+    sender = TelegramSender(global_rate=10, chat_rate=1e6)
+
+    started = time.monotonic()
+    sender.send_many([(chat_id, "hi") for chat_id in "1234"], parse_mode=None)
+
+    assert time.monotonic() - started >= 0.3
@@ -0,0 +1,76 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from optifeed.utils.config import TELEGRAM_BOT_USERNAME
+from optifeed.worker import worker
+from optifeed.worker.dispatcher import KeyedDispatcher
+
+
+def ask_body(user_id: int, text: str) -> bytes:
+    message = {"from": {"id": user_id}, "chat": {"id": user_id}, "text": text}
+    return json.dumps({"type": "ask", "data": {"message": message}}).encode()
+
+
+class FakeConnection:
+    def add_callback_threadsafe(self, callback):
+        callback()
+
+
+def test_questions_over_the_cap_are_turned_down_and_acked(monkeypatch):
+    release, processed, notices, acked = threading.Event(), [], [], []
+
+    def process_task(task):
+        release.wait(5)
+        processed.append(task["data"]["message"]["text"])
+
+    monkeypatch.setattr(worker, "process_task", process_task)
+    monkeypatch.setattr(worker, "send_telegram_message", notices.append)
+    dispatcher = KeyedDispatcher(max_workers=4, max_queued_per_key=1)
+    callback = worker.make_callback(FakeConnection(), dispatcher)
+    channel = SimpleNamespace(basic_ack=lambda delivery_tag: acked.append(delivery_tag))
+
+    for tag in range(4):
+        callback(
+            channel,
+            SimpleNamespace(delivery_tag=tag),
+            None,
+            ask_body(1, f"{TELEGRAM_BOT_USERNAME} question {tag}"),
+        )
+    # Not meant for the bot: not ordered, so never turned down
+    callback(channel, SimpleNamespace(delivery_tag=4), None, ask_body(1, "hello all"))
+    release.set()
+    deadline = time.monotonic() + 5
+    while len(acked) < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    dispatcher.shutdown()
+
+    assert sorted(acked) == [0, 1, 2, 3, 4]
+    assert len(notices) == 2
+    questions = [text for text in processed if text != "hello all"]
+    assert questions == [
+        f"{TELEGRAM_BOT_USERNAME} question 0",
+        f"{TELEGRAM_BOT_USERNAME} question 1",
+    ]
+    assert "hello all" in processed
+
+
+def test_legacy_tasks_are_moved_to_their_lane():
+    published, acked = [], []
+    channel = SimpleNamespace(
+        basic_publish=lambda exchange, routing_key, body, properties: published.append(
+            (routing_key, body)
+        ),
+        basic_ack=lambda delivery_tag: acked.append(delivery_tag),
+    )
+    alert = json.dumps({"type": "alert", "message": "Oil jumps"}).encode()
+
+    worker.move_legacy_task(channel, SimpleNamespace(delivery_tag=1), None, alert)
+    worker.move_legacy_task(
+        channel, SimpleNamespace(delivery_tag=2), None, ask_body(1, "Bonjour")
+    )
+
+    assert [queue for queue, _ in published] == ["alerts", "asks"]
+    assert published[0][1] == alert
+    assert acked == [1, 2]